@@ -1,17 +1,84 @@
 import pandas as pd
 import numpy as np
 import logging
+import math
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Optional, Tuple
+from collections import OrderedDict
 from datetime import date, timedelta
-from dataclasses import dataclass
-from scipy import stats
-from sklearn.ensemble import IsolationForest
-from sklearn.preprocessing import StandardScaler
+from dataclasses import dataclass, field, replace
+from functools import cached_property
 from config import config
 
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    import numexpr  # noqa: F401 - enables DataFrame.eval(engine='numexpr')
+    NUMEXPR_AVAILABLE = True
+except ImportError:
+    NUMEXPR_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Bins of the per-contract category code used by the fused aggregation pass
+_CATEGORY_COUNT = 16
+_CATEGORY_CODES = np.arange(_CATEGORY_COUNT)
+_CALL_BINS = (_CATEGORY_CODES & 1) != 0
+_PUT_BINS = (_CATEGORY_CODES & 2) != 0
+_SHORT_TERM_CALL_BINS = (_CATEGORY_CODES & 5) == 5
+_OTM_CALL_BINS = (_CATEGORY_CODES & 9) == 9
+
+_AGGREGATE_KEYS = (
+    'call_volume', 'put_volume', 'short_term_call_volume',
+    'otm_call_volume', 'call_oi', 'put_oi'
+)
+
+def _aggregate_today(symbol_id, n_symbols, expiration_days, strike, is_call, is_put,
+                     volume, open_interest, short_term_cutoff, otm_thresholds):
+    """Single loop over today's contracts; row k of the result holds symbol k's _AGGREGATE_KEYS sums."""
+    sums = np.zeros((n_symbols, 6), dtype=np.int64)
+    
+    for i in range(volume.shape[0]):
+        row = symbol_id[i]
+        if is_call[i]:
+            sums[row, 0] += volume[i]
+            sums[row, 4] += open_interest[i]
+            if expiration_days[i] <= short_term_cutoff:
+                sums[row, 2] += volume[i]
+            if strike[i] > otm_thresholds[row]:
+                sums[row, 3] += volume[i]
+        elif is_put[i]:
+            sums[row, 1] += volume[i]
+            sums[row, 5] += open_interest[i]
+    
+    return sums
+
+# Compiled once and cached on disk; without numba the NumPy binning pass is used instead
+_aggregate_today_jit = njit(cache=True, fastmath=True)(_aggregate_today) if NUMBA_AVAILABLE else None
+
+def _partition_quantiles(values: np.ndarray, quantiles: Tuple[float, ...]) -> np.ndarray:
+    """Linearly interpolated quantiles (pandas' default) using one O(n) np.partition."""
+    positions = np.asarray(quantiles) * (values.size - 1)
+    lower = np.floor(positions).astype(np.intp)
+    upper = np.minimum(lower + 1, values.size - 1)
+    
+    partitioned = np.partition(values, np.unique(np.concatenate((lower, upper))))
+    return partitioned[lower] + (partitioned[upper] - partitioned[lower]) * (positions - lower)
+
+def _compute_baselines_worker(task: Tuple[pd.DataFrame, date, float]) -> Optional[Dict]:
+    """Compute one symbol's baselines in a worker process, using that process's global detector."""
+    historical_data, snapshot_date, stock_price = task
+    try:
+        return anomaly_detector._compute_baselines(historical_data, stock_price)
+    except Exception:
+        # Left uncached; the symbol's own error boundary in detect_anomalies_batch reports it
+        return None
+
+@dataclass(slots=True, frozen=True)
 class AnomalyResult:
     """Result of anomaly detection analysis."""
     symbol: str
@@ -49,7 +116,46 @@ class AnomalyResult:
     # Additional metrics
     unusual_activity_score: float
     insider_probability: float
-    notes: str
+    
+    # Explicit notes override; otherwise notes are formatted lazily from the triggers
+    _notes: Optional[str] = field(default=None, repr=False, compare=False)
+    
+    @property
+    def notes(self) -> str:
+        """Human-readable notes about detected anomalies, formatted on first access."""
+        if self._notes is None:
+            notes = []
+            
+            if self.call_volume_trigger:
+                notes.append(f"Call volume {self.call_volume_ratio:.1f}x normal")
+            
+            if self.put_volume_trigger:
+                notes.append(f"Put volume {self.put_volume_ratio:.1f}x normal")
+            
+            if self.short_term_call_trigger:
+                notes.append(f"Short-term call volume {self.short_term_call_ratio:.1f}x normal")
+            
+            if self.otm_call_trigger:
+                notes.append(f"OTM call volume {self.otm_call_ratio:.1f}x normal")
+            
+            if self.call_oi_trigger:
+                notes.append(f"Unusual OI change: {self.call_oi_ratio:.1f}x normal")
+            
+            object.__setattr__(self, '_notes', "; ".join(notes) if notes else "No significant anomalies detected")
+        
+        return self._notes
+
+# Template for the common case where no trigger fires (score and probability are fixed)
+NO_ANOMALY_RESULT = AnomalyResult(
+    symbol="",
+    snapshot_date=date.min,
+    call_volume=0, call_volume_baseline=0, call_volume_ratio=0, call_volume_trigger=False,
+    put_volume=0, put_volume_baseline=0, put_volume_ratio=0, put_volume_trigger=False,
+    short_term_call_volume=0, short_term_call_baseline=0, short_term_call_ratio=0, short_term_call_trigger=False,
+    otm_call_volume=0, otm_call_baseline=0, otm_call_ratio=0, otm_call_trigger=False,
+    call_oi_delta=0, call_oi_baseline=0, call_oi_ratio=0, call_oi_trigger=False,
+    unusual_activity_score=0.0, insider_probability=0.0
+)
 
 class AnomalyDetector:
     """Enhanced anomaly detection for options trading."""
@@ -60,45 +166,135 @@ class AnomalyDetector:
         self.short_term_days = config.SHORT_TERM_DAYS
         self.otm_percentage = config.OTM_PERCENTAGE
         
-        # Initialize ML models with better parameters for options data
-        self.isolation_forest = IsolationForest(
-            contamination=0.05,  # Lower contamination for more precise detection
-            random_state=42,
-            n_estimators=100,  # More trees for better accuracy
-            max_samples='auto'
-        )
-        self.scaler = StandardScaler()
-        
         # Additional parameters for options-specific detection
         self.min_data_points = 5  # Minimum data points needed for baseline
         self.volume_weight = 0.4   # Weight for volume anomalies
         self.oi_weight = 0.3       # Weight for open interest anomalies
         self.short_term_weight = 0.2  # Weight for short-term anomalies
         self.otm_weight = 0.1      # Weight for OTM anomalies
+        
+        # LRU cache of baselines keyed by (symbol, date, stock price); a symbol's history is taken
+        # as fixed for a date until clear_baseline_cache
+        self.baseline_cache_size = 4096
+        self._baseline_cache = OrderedDict()
+        
+        # Baselines for large batches are computed across processes
+        self.max_workers = config.DETECTION_WORKERS
+        self.parallel_min_symbols = 50  # Below this, process start-up outweighs the work
+    
+    @cached_property
+    def isolation_forest(self):
+        """ML model for options data, built on first use to keep sklearn off the import path."""
+        from sklearn.ensemble import IsolationForest
+        
+        return IsolationForest(
+            contamination=0.05,  # Lower contamination for more precise detection
+            random_state=42,
+            n_estimators=100,  # More trees for better accuracy
+            max_samples='auto'
+        )
+    
+    @cached_property
+    def scaler(self):
+        """Feature scaler for the ML model, built on first use."""
+        from sklearn.preprocessing import StandardScaler
+        
+        return StandardScaler()
     
     def detect_anomalies(self, symbol: str, snapshot_date: date, 
                         options_data: List, stock_price: float,
                         historical_data: pd.DataFrame) -> AnomalyResult:
         """Detect anomalies in options trading activity."""
-        
-        # Convert options data to DataFrame for easier analysis
-        df = pd.DataFrame([{
-            'expiration': opt.expiration,
-            'strike': opt.strike,
-            'option_type': opt.option_type,
-            'volume': opt.volume,
-            'open_interest': opt.open_interest,
-            'implied_volatility': opt.implied_volatility
-        } for opt in options_data])
-        
-        if df.empty:
-            return self._create_empty_result(symbol, snapshot_date)
-        
-        # Calculate various anomaly metrics
-        volume_anomalies = self._detect_volume_anomalies(df, historical_data, stock_price)
-        short_term_anomalies = self._detect_short_term_anomalies(df, historical_data, stock_price)
-        otm_anomalies = self._detect_otm_anomalies(df, historical_data, stock_price)
-        oi_anomalies = self._detect_oi_anomalies(df, historical_data)
+        return self.detect_anomalies_batch(
+            snapshot_date,
+            {symbol: options_data},
+            {symbol: stock_price},
+            {symbol: historical_data},
+            raise_errors=True
+        )[symbol]
+    
+    def detect_anomalies_batch(self, snapshot_date: date, options_by_symbol: Dict[str, List],
+                               stock_prices: Dict[str, float],
+                               historical_by_symbol: Dict[str, pd.DataFrame],
+                               raise_errors: bool = False) -> Dict[str, AnomalyResult]:
+        """Detect anomalies for many symbols in one pass; symbols that fail are logged and left out."""
+        # A price that can't be used as a number fails only its own symbol
+        prices = {}
+        for symbol in options_by_symbol:
+            try:
+                prices[symbol] = float(stock_prices[symbol])
+            except (KeyError, TypeError, ValueError) as e:
+                if raise_errors:
+                    raise
+                logger.error(f"Error detecting anomalies for {symbol}: invalid stock price ({e})")
+        
+        symbols = list(prices)
+        if not symbols:
+            return {}
+        
+        # Convert options data to column arrays for vectorized aggregation
+        soa = self._options_to_soa(options_by_symbol, symbols)
+        
+        # Aggregate today's activity for every symbol at once
+        otm_thresholds = np.array([prices[symbol] for symbol in symbols], dtype=np.float64)
+        otm_thresholds *= 1 + self.otm_percentage / 100
+        aggregates = self._compute_today_aggregates(soa, otm_thresholds)
+        
+        # Fill the baseline cache for symbols with history in parallel; the loop below then hits it
+        self._prefetch_baselines({
+            symbol: (historical_by_symbol[symbol], snapshot_date, prices[symbol])
+            for i, symbol in enumerate(symbols)
+            if soa['counts'][i] and historical_by_symbol.get(symbol) is not None
+            and not historical_by_symbol[symbol].empty
+        })
+        
+        results = {}
+        for i, symbol in enumerate(symbols):
+            if soa['counts'][i] == 0:
+                results[symbol] = self._create_empty_result(symbol, snapshot_date)
+                continue
+            
+            # int64 sums become plain ints once per symbol, not once per detector
+            today = dict(zip(_AGGREGATE_KEYS, aggregates[i].tolist()))
+            
+            # Without history every baseline is zero, so nothing can trigger
+            historical_data = historical_by_symbol.get(symbol)
+            if historical_data is None or historical_data.empty:
+                results[symbol] = self._detect_today_only(symbol, snapshot_date, today)
+                continue
+            
+            try:
+                # Baselines only depend on history, so reuse them across repeated calls
+                baselines = self._get_baselines(symbol, historical_data, snapshot_date, prices[symbol])
+                results[symbol] = self._build_result(symbol, snapshot_date, today, baselines)
+            except Exception as e:
+                if raise_errors:
+                    raise
+                logger.error(f"Error detecting anomalies for {symbol}: {e}")
+        
+        return results
+    
+    def _build_result(self, symbol: str, snapshot_date: date, today: Dict,
+                      baselines: Dict) -> AnomalyResult:
+        """Score one symbol's aggregates against its baselines."""
+        volume_anomalies = self._detect_volume_anomalies(today, baselines)
+        short_term_anomalies = self._detect_short_term_anomalies(today, baselines)
+        otm_anomalies = self._detect_otm_anomalies(today, baselines)
+        oi_anomalies = self._detect_oi_anomalies(today, baselines)
+        
+        # Most symbols are quiet: skip scoring when nothing fired
+        if not (volume_anomalies['call_volume_trigger'] or volume_anomalies['put_volume_trigger'] or
+                short_term_anomalies['short_term_call_trigger'] or otm_anomalies['otm_call_trigger'] or
+                oi_anomalies['call_oi_trigger']):
+            return replace(
+                NO_ANOMALY_RESULT,
+                symbol=symbol,
+                snapshot_date=snapshot_date,
+                **volume_anomalies,
+                **short_term_anomalies,
+                **otm_anomalies,
+                **oi_anomalies
+            )
         
         # Calculate composite scores
         unusual_activity_score = self._calculate_unusual_activity_score(
@@ -109,11 +305,6 @@ class AnomalyDetector:
             volume_anomalies, short_term_anomalies, otm_anomalies, oi_anomalies
         )
         
-        # Generate notes
-        notes = self._generate_anomaly_notes(
-            volume_anomalies, short_term_anomalies, otm_anomalies, oi_anomalies
-        )
-        
         return AnomalyResult(
             symbol=symbol,
             snapshot_date=snapshot_date,
@@ -122,21 +313,157 @@ class AnomalyDetector:
             **otm_anomalies,
             **oi_anomalies,
             unusual_activity_score=unusual_activity_score,
-            insider_probability=insider_probability,
-            notes=notes
+            insider_probability=insider_probability
         )
     
-    def _detect_volume_anomalies(self, df: pd.DataFrame, historical_data: pd.DataFrame, 
-                                stock_price: float) -> Dict:
+    def _detect_today_only(self, symbol: str, snapshot_date: date, today: Dict) -> AnomalyResult:
+        """Result for a symbol with no history: today's volumes only, zero baselines and ratios."""
+        return replace(
+            NO_ANOMALY_RESULT,
+            symbol=symbol,
+            snapshot_date=snapshot_date,
+            call_volume=today['call_volume'],
+            put_volume=today['put_volume'],
+            short_term_call_volume=today['short_term_call_volume'],
+            otm_call_volume=today['otm_call_volume'],
+            call_oi_delta=today['call_oi'] - today['put_oi']
+        )
+    
+    def _options_to_soa(self, options_by_symbol: Dict[str, List], symbols: List[str]) -> Dict:
+        """Extract all symbols' options into contiguous NumPy arrays tagged with a symbol_id."""
+        counts = np.array([len(options_by_symbol[symbol]) for symbol in symbols], dtype=np.int64)
+        options_data = [opt for symbol in symbols for opt in options_by_symbol[symbol]]
+        n = len(options_data)
+        option_types = np.array([opt.option_type for opt in options_data], dtype=object)
+        
+        # np.fromiter with a preset count skips the intermediate list and dtype inference
+        return {
+            'counts': counts,
+            'symbol_id': np.repeat(np.arange(len(symbols), dtype=np.int64), counts),
+            'expiration_days': np.fromiter((opt.expiration.toordinal() for opt in options_data),
+                                           dtype=np.int32, count=n),
+            'strike': np.fromiter((opt.strike for opt in options_data), dtype=np.float64, count=n),
+            'is_call': option_types == 'CALL',
+            'is_put': option_types == 'PUT',
+            'volume': np.fromiter((opt.volume or 0 for opt in options_data), dtype=np.int64, count=n),
+            'open_interest': np.fromiter((opt.open_interest or 0 for opt in options_data),
+                                         dtype=np.int64, count=n),
+            'implied_volatility': np.fromiter(
+                (np.nan if opt.implied_volatility is None else opt.implied_volatility
+                 for opt in options_data), dtype=np.float64, count=n
+            )
+        }
+    
+    def _baseline_key(self, symbol: str, snapshot_date: date, stock_price: float) -> Tuple:
+        """LRU cache key: symbol, date and stock price."""
+        return (symbol, snapshot_date, round(float(stock_price), 4))
+    
+    def _cache_baselines(self, key: Tuple, baselines: Dict):
+        """Store baselines in the LRU cache, evicting the oldest entry when full."""
+        self._baseline_cache[key] = baselines
+        if len(self._baseline_cache) > self.baseline_cache_size:
+            self._baseline_cache.popitem(last=False)
+    
+    def _get_baselines(self, symbol: str, historical_data: pd.DataFrame, snapshot_date: date,
+                       stock_price: float) -> Dict:
+        """Get all historical baselines, served from the LRU cache when possible."""
+        key = self._baseline_key(symbol, snapshot_date, stock_price)
+        
+        baselines = self._baseline_cache.get(key)
+        if baselines is not None:
+            self._baseline_cache.move_to_end(key)
+            return baselines
+        
+        baselines = self._compute_baselines(historical_data, stock_price)
+        self._cache_baselines(key, baselines)
+        
+        return baselines
+    
+    def _compute_baselines(self, historical_data: pd.DataFrame, stock_price: float) -> Dict:
+        """Compute every baseline for one symbol's history."""
+        history_by_type = self._partition_by_type(historical_data)
+        return {
+            'call_volume': self._calculate_volume_baseline(history_by_type['CALL']),
+            'put_volume': self._calculate_volume_baseline(history_by_type['PUT']),
+            'short_term_call': self._calculate_short_term_baseline(historical_data, 'CALL'),
+            'otm_call': self._calculate_otm_baseline(historical_data, stock_price),
+            'call_oi': self._calculate_oi_baseline(historical_data)
+        }
+    
+    def _prefetch_baselines(self, tasks: Dict[str, Tuple[pd.DataFrame, date, float]]):
+        """Compute uncached baselines across worker processes when the batch is large enough."""
+        if self.max_workers <= 1 or len(tasks) < self.parallel_min_symbols:
+            return
+        
+        keyed = {}
+        for symbol, task in tasks.items():
+            key = self._baseline_key(symbol, task[1], task[2])
+            if key not in self._baseline_cache:
+                keyed[key] = task
+        if len(keyed) < self.parallel_min_symbols:
+            return
+        
+        # Only history slices cross the process boundary; workers need no database access
+        chunksize = max(1, len(keyed) // (self.max_workers * 4))
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            for key, baselines in zip(keyed, executor.map(_compute_baselines_worker, keyed.values(),
+                                                          chunksize=chunksize)):
+                if baselines is not None:
+                    self._cache_baselines(key, baselines)
+    
+    def _partition_by_type(self, historical_data: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        """Split history into CALL and PUT views with a single scan of option_type."""
+        if historical_data.empty:
+            return {'CALL': historical_data, 'PUT': historical_data}
+        
+        option_type = historical_data['option_type'].values
+        return {t: historical_data[option_type == t] for t in ('CALL', 'PUT')}
+    
+    def clear_baseline_cache(self):
+        """Drop cached baselines (call at the end of a daily batch run)."""
+        self._baseline_cache.clear()
+    
+    def _compute_today_aggregates(self, soa: Dict, otm_thresholds: np.ndarray) -> np.ndarray:
+        """Aggregate today's volume and OI per symbol in a single pass (columns: _AGGREGATE_KEYS)."""
+        short_term_cutoff = (date.today() + timedelta(days=self.short_term_days)).toordinal()
+        n_symbols = len(soa['counts'])
+        
+        if _aggregate_today_jit is not None:
+            return _aggregate_today_jit(
+                soa['symbol_id'], n_symbols, soa['expiration_days'], soa['strike'],
+                soa['is_call'], soa['is_put'], soa['volume'], soa['open_interest'],
+                short_term_cutoff, otm_thresholds
+            )
+        
+        # One category code per contract: bit 0 call, bit 1 put, bit 2 short-term, bit 3 OTM strike
+        category = (
+            soa['is_call'].astype(np.int8)
+            + 2 * soa['is_put']
+            + 4 * (soa['expiration_days'] <= short_term_cutoff)
+            + 8 * (soa['strike'] > otm_thresholds[soa['symbol_id']])
+        )
+        bins = soa['symbol_id'] * _CATEGORY_COUNT + category
+        size = n_symbols * _CATEGORY_COUNT
+        volume_bins = np.bincount(bins, weights=soa['volume'], minlength=size).reshape(n_symbols, -1)
+        oi_bins = np.bincount(bins, weights=soa['open_interest'], minlength=size).reshape(n_symbols, -1)
+        
+        return np.column_stack((
+            volume_bins[:, _CALL_BINS].sum(axis=1),
+            volume_bins[:, _PUT_BINS].sum(axis=1),
+            volume_bins[:, _SHORT_TERM_CALL_BINS].sum(axis=1),
+            volume_bins[:, _OTM_CALL_BINS].sum(axis=1),
+            oi_bins[:, _CALL_BINS].sum(axis=1),
+            oi_bins[:, _PUT_BINS].sum(axis=1)
+        )).astype(np.int64)
+    
+    def _detect_volume_anomalies(self, today: Dict, baselines: Dict) -> Dict:
         """Detect volume anomalies for calls and puts."""
         
-        # Calculate today's volumes (convert numpy.int64 to regular int)
-        call_volume = int(df[df['option_type'] == 'CALL']['volume'].sum())
-        put_volume = int(df[df['option_type'] == 'PUT']['volume'].sum())
+        call_volume = today['call_volume']
+        put_volume = today['put_volume']
         
-        # Calculate baselines from historical data
-        call_baseline = self._calculate_volume_baseline(historical_data, 'CALL')
-        put_baseline = self._calculate_volume_baseline(historical_data, 'PUT')
+        call_baseline = baselines['call_volume']
+        put_baseline = baselines['put_volume']
         
         # Calculate ratios
         call_ratio = call_volume / call_baseline if call_baseline > 0 else 0
@@ -153,18 +480,11 @@ class AnomalyDetector:
             'put_volume_trigger': put_ratio > self.volume_threshold
         }
     
-    def _detect_short_term_anomalies(self, df: pd.DataFrame, historical_data: pd.DataFrame,
-                                   stock_price: float) -> Dict:
+    def _detect_short_term_anomalies(self, today: Dict, baselines: Dict) -> Dict:
         """Detect anomalies in short-term options."""
         
-        # Filter for short-term options
-        short_term_date = date.today() + timedelta(days=self.short_term_days)
-        short_term_df = df[df['expiration'] <= short_term_date]
-        
-        short_term_call_volume = int(short_term_df[short_term_df['option_type'] == 'CALL']['volume'].sum())
-        
-        # Calculate baseline for short-term calls
-        short_term_baseline = self._calculate_short_term_baseline(historical_data, 'CALL')
+        short_term_call_volume = today['short_term_call_volume']
+        short_term_baseline = baselines['short_term_call']
         
         short_term_ratio = short_term_call_volume / short_term_baseline if short_term_baseline > 0 else 0
         
@@ -175,18 +495,11 @@ class AnomalyDetector:
             'short_term_call_trigger': short_term_ratio > self.volume_threshold
         }
     
-    def _detect_otm_anomalies(self, df: pd.DataFrame, historical_data: pd.DataFrame,
-                             stock_price: float) -> Dict:
+    def _detect_otm_anomalies(self, today: Dict, baselines: Dict) -> Dict:
         """Detect anomalies in out-of-the-money options."""
         
-        # Filter for OTM calls
-        otm_threshold = stock_price * (1 + self.otm_percentage / 100)
-        otm_df = df[(df['option_type'] == 'CALL') & (df['strike'] > otm_threshold)]
-        
-        otm_call_volume = int(otm_df['volume'].sum())
-        
-        # Calculate baseline for OTM calls
-        otm_baseline = self._calculate_otm_baseline(historical_data, stock_price)
+        otm_call_volume = today['otm_call_volume']
+        otm_baseline = baselines['otm_call']
         
         otm_ratio = otm_call_volume / otm_baseline if otm_baseline > 0 else 0
         
@@ -197,18 +510,15 @@ class AnomalyDetector:
             'otm_call_trigger': otm_ratio > self.volume_threshold
         }
     
-    def _detect_oi_anomalies(self, df: pd.DataFrame, historical_data: pd.DataFrame) -> Dict:
+    def _detect_oi_anomalies(self, today: Dict, baselines: Dict) -> Dict:
         """Detect open interest anomalies."""
         
         # Calculate today's OI delta
-        call_oi = df[df['option_type'] == 'CALL']['open_interest'].sum()
-        put_oi = df[df['option_type'] == 'PUT']['open_interest'].sum()
-        call_oi_delta = int(call_oi - put_oi)
-        
-        # Calculate baseline OI delta
-        oi_baseline = self._calculate_oi_baseline(historical_data)
+        call_oi_delta = today['call_oi'] - today['put_oi']
+        oi_baseline = baselines['call_oi']
         
-        oi_ratio = abs(call_oi_delta) / abs(oi_baseline) if abs(oi_baseline) > 0 else 0
+        oi_denominator = math.fabs(oi_baseline)
+        oi_ratio = math.fabs(call_oi_delta) / oi_denominator if oi_denominator > 0 else 0
         
         return {
             'call_oi_delta': call_oi_delta,
@@ -217,47 +527,56 @@ class AnomalyDetector:
             'call_oi_trigger': oi_ratio > self.oi_threshold
         }
     
-    def _calculate_volume_baseline(self, historical_data: pd.DataFrame, option_type: str) -> float:
-        """Calculate baseline volume from historical data with outlier removal."""
-        if historical_data.empty:
+    def _calculate_volume_baseline(self, type_data: pd.DataFrame) -> float:
+        """Calculate baseline volume from one option type's history with outlier removal."""
+        if type_data.empty or len(type_data) < self.min_data_points:
             return 0.0
         
-        # Filter for option type
-        type_data = historical_data[historical_data['option_type'] == option_type]
-        if type_data.empty or len(type_data) < self.min_data_points:
+        volume = type_data['volume'].dropna().to_numpy(dtype=np.float64)
+        if volume.size == 0:
             return 0.0
         
-        # Remove outliers using IQR method
-        Q1 = type_data['volume'].quantile(0.25)
-        Q3 = type_data['volume'].quantile(0.75)
+        # Remove outliers using IQR method (selection instead of full sorts)
+        Q1, Q3 = _partition_quantiles(volume, (0.25, 0.75))
         IQR = Q3 - Q1
         lower_bound = Q1 - 1.5 * IQR
         upper_bound = Q3 + 1.5 * IQR
         
-        filtered_data = type_data[
-            (type_data['volume'] >= lower_bound) & 
-            (type_data['volume'] <= upper_bound)
-        ]
+        filtered_volume = volume[(volume >= lower_bound) & (volume <= upper_bound)]
         
-        if filtered_data.empty:
-            return type_data['volume'].median()
+        if filtered_volume.size == 0:
+            return _partition_quantiles(volume, (0.5,))[0]
         
         # Calculate median volume (more robust than mean)
-        return filtered_data['volume'].median()
+        return _partition_quantiles(filtered_volume, (0.5,))[0]
     
     def _calculate_short_term_baseline(self, historical_data: pd.DataFrame, option_type: str) -> float:
         """Calculate baseline for short-term options."""
         if historical_data.empty:
             return 0
         
-        # Filter for short-term options
-        short_term_date = date.today() + timedelta(days=self.short_term_days)
-        short_term_data = historical_data[
-            (historical_data['option_type'] == option_type) &
-            (historical_data['expiration'] <= short_term_date)
-        ]
+        # Filter for short-term options (integer day comparison instead of date objects)
+        short_term_cutoff = (date.today() + timedelta(days=self.short_term_days)).toordinal()
+        expiration_days = self._expiration_days(historical_data)
+        
+        if NUMEXPR_AVAILABLE:
+            mask = historical_data.eval(
+                "option_type == @option_type and @expiration_days <= @short_term_cutoff",
+                engine='numexpr'
+            )
+        else:
+            mask = (historical_data['option_type'] == option_type) & (expiration_days <= short_term_cutoff)
+        
+        short_term_volume = historical_data.loc[mask, 'volume']
+        return short_term_volume.mean() if not short_term_volume.empty else 0
+    
+    def _expiration_days(self, historical_data: pd.DataFrame) -> np.ndarray:
+        """Expirations as int32 ordinal days, reusing the precomputed column when present."""
+        if 'expiration_days' in historical_data.columns:
+            return historical_data['expiration_days'].to_numpy()
         
-        return short_term_data['volume'].mean() if not short_term_data.empty else 0
+        return np.fromiter((exp.toordinal() for exp in historical_data['expiration']),
+                           dtype=np.int32, count=len(historical_data))
     
     def _calculate_otm_baseline(self, historical_data: pd.DataFrame, stock_price: float) -> float:
         """Calculate baseline for OTM options."""
@@ -265,55 +584,66 @@ class AnomalyDetector:
             return 0
         
         # Filter for OTM calls
-        otm_threshold = stock_price * (1 + self.otm_percentage / 100)
-        otm_data = historical_data[
-            (historical_data['option_type'] == 'CALL') &
-            (historical_data['strike'] > otm_threshold)
-        ]
+        otm_threshold = float(stock_price) * (1 + self.otm_percentage / 100)
         
-        return otm_data['volume'].mean() if not otm_data.empty else 0
+        if NUMEXPR_AVAILABLE:
+            mask = historical_data.eval(
+                "option_type == 'CALL' and strike > @otm_threshold", engine='numexpr'
+            )
+        else:
+            mask = (historical_data['option_type'] == 'CALL') & (historical_data['strike'] > otm_threshold)
+        
+        otm_volume = historical_data.loc[mask, 'volume']
+        return otm_volume.mean() if not otm_volume.empty else 0
     
     def _calculate_oi_baseline(self, historical_data: pd.DataFrame) -> float:
         """Calculate baseline OI delta."""
         if historical_data.empty:
             return 0
         
-        # Calculate OI delta for each date
-        oi_deltas = []
-        for date in historical_data['snapshot_date'].unique():
-            date_data = historical_data[historical_data['snapshot_date'] == date]
-            call_oi = date_data[date_data['option_type'] == 'CALL']['open_interest'].sum()
-            put_oi = date_data[date_data['option_type'] == 'PUT']['open_interest'].sum()
-            oi_deltas.append(call_oi - put_oi)
+        # Sign open interest (+calls, -puts) so each date's delta is a plain sum
+        option_type = historical_data['option_type'].values
+        sign = np.where(option_type == 'CALL', 1, np.where(option_type == 'PUT', -1, 0))
+        signed_oi = historical_data['open_interest'].fillna(0).values * sign
+        
+        # Only the mean is needed, so skip sorting the date groups
+        oi_deltas = pd.Series(signed_oi).groupby(historical_data['snapshot_date'].values, sort=False).sum()
         
-        return np.mean(oi_deltas) if oi_deltas else 0
+        return oi_deltas.mean() if not oi_deltas.empty else 0
     
     def _calculate_unusual_activity_score(self, volume_anomalies: Dict, 
                                         short_term_anomalies: Dict,
                                         otm_anomalies: Dict, oi_anomalies: Dict) -> float:
         """Calculate composite unusual activity score."""
         
-        scores = []
+        # Running mean of the capped ratios for each fired trigger
+        total = 0.0
+        count = 0
         
         # Volume scores
         if volume_anomalies['call_volume_trigger']:
-            scores.append(min(volume_anomalies['call_volume_ratio'] / self.volume_threshold, 3.0))
+            total += min(volume_anomalies['call_volume_ratio'] / self.volume_threshold, 3.0)
+            count += 1
         if volume_anomalies['put_volume_trigger']:
-            scores.append(min(volume_anomalies['put_volume_ratio'] / self.volume_threshold, 3.0))
+            total += min(volume_anomalies['put_volume_ratio'] / self.volume_threshold, 3.0)
+            count += 1
         
         # Short-term scores
         if short_term_anomalies['short_term_call_trigger']:
-            scores.append(min(short_term_anomalies['short_term_call_ratio'] / self.volume_threshold, 3.0))
+            total += min(short_term_anomalies['short_term_call_ratio'] / self.volume_threshold, 3.0)
+            count += 1
         
         # OTM scores
         if otm_anomalies['otm_call_trigger']:
-            scores.append(min(otm_anomalies['otm_call_ratio'] / self.volume_threshold, 3.0))
+            total += min(otm_anomalies['otm_call_ratio'] / self.volume_threshold, 3.0)
+            count += 1
         
         # OI scores
         if oi_anomalies['call_oi_trigger']:
-            scores.append(min(oi_anomalies['call_oi_ratio'] / self.oi_threshold, 3.0))
+            total += min(oi_anomalies['call_oi_ratio'] / self.oi_threshold, 3.0)
+            count += 1
         
-        return np.mean(scores) if scores else 0.0
+        return total / count if count else 0.0
     
     def _calculate_insider_probability(self, volume_anomalies: Dict,
                                      short_term_anomalies: Dict,
@@ -364,30 +694,6 @@ class AnomalyDetector:
         
         return min(probability, 1.0)
     
-    def _generate_anomaly_notes(self, volume_anomalies: Dict,
-                              short_term_anomalies: Dict,
-                              otm_anomalies: Dict, oi_anomalies: Dict) -> str:
-        """Generate human-readable notes about detected anomalies."""
-        
-        notes = []
-        
-        if volume_anomalies['call_volume_trigger']:
-            notes.append(f"Call volume {volume_anomalies['call_volume_ratio']:.1f}x normal")
-        
-        if volume_anomalies['put_volume_trigger']:
-            notes.append(f"Put volume {volume_anomalies['put_volume_ratio']:.1f}x normal")
-        
-        if short_term_anomalies['short_term_call_trigger']:
-            notes.append(f"Short-term call volume {short_term_anomalies['short_term_call_ratio']:.1f}x normal")
-        
-        if otm_anomalies['otm_call_trigger']:
-            notes.append(f"OTM call volume {otm_anomalies['otm_call_ratio']:.1f}x normal")
-        
-        if oi_anomalies['call_oi_trigger']:
-            notes.append(f"Unusual OI change: {oi_anomalies['call_oi_ratio']:.1f}x normal")
-        
-        return "; ".join(notes) if notes else "No significant anomalies detected"
-    
     def _create_empty_result(self, symbol: str, snapshot_date: date) -> AnomalyResult:
         """Create empty result when no data is available."""
         return AnomalyResult(
@@ -398,7 +704,7 @@ class AnomalyDetector:
             short_term_call_volume=0, short_term_call_baseline=0, short_term_call_ratio=0, short_term_call_trigger=False,
             otm_call_volume=0, otm_call_baseline=0, otm_call_ratio=0, otm_call_trigger=False,
             call_oi_delta=0, call_oi_baseline=0, call_oi_ratio=0, call_oi_trigger=False,
-            unusual_activity_score=0.0, insider_probability=0.0, notes="No options data available"
+            unusual_activity_score=0.0, insider_probability=0.0, _notes="No options data available"
         )
 
 # Global anomaly detector instance
@@ -5,7 +5,11 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import date, timedelta
 import numpy as np
-from sqlalchemy import create_engine, text
+import pyarrow as pa
+from sqlalchemy import bindparam, create_engine, text
+from concurrent.futures import ThreadPoolExecutor
+import io
+import queue
 import sys
 import os
 
@@ -14,10 +18,54 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import config
 import logging
 
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    import adbc_driver_postgresql.dbapi as adbc_pg
+    from sqlalchemy.dialects.postgresql.asyncpg import PGDialect_asyncpg
+    ADBC_AVAILABLE = True
+except ImportError:
+    ADBC_AVAILABLE = False
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+GREEK_COLUMNS = ['delta', 'gamma', 'theta', 'vega']
+
+def _corr4(x):
+    """Pearson correlation of the four columns of an (N, 4) float array, accumulated in float64."""
+    n = x.shape[0]
+    means = np.zeros(4)
+    for i in range(n):
+        for a in range(4):
+            means[a] += x[i, a]
+    for a in range(4):
+        means[a] /= n
+    
+    cov = np.zeros((4, 4))
+    for i in range(n):
+        for a in range(4):
+            da = x[i, a] - means[a]
+            for b in range(a, 4):
+                cov[a, b] += da * (x[i, b] - means[b])
+    
+    corr = np.empty((4, 4))
+    for a in range(4):
+        for b in range(a, 4):
+            denom = np.sqrt(cov[a, a] * cov[b, b])
+            corr[a, b] = cov[a, b] / denom if denom > 0 else np.nan
+            corr[b, a] = corr[a, b]
+    
+    return corr
+
+# Compiled once and cached on disk; without numba pandas' corr is used instead
+_corr4_jit = njit(cache=True)(_corr4) if NUMBA_AVAILABLE else None
+
 # Page configuration
 st.set_page_config(
     page_title="Options Tracker Dashboard",
@@ -89,13 +137,112 @@ st.markdown("""
 def get_database_connection():
     """Get database connection with caching."""
     try:
-        engine = create_engine(config.SUPABASE_DB_URL)
+        engine = create_engine(
+            config.SUPABASE_DB_URL,
+            pool_size=5,
+            max_overflow=10,
+            pool_pre_ping=True,
+            pool_use_lifo=True,  # Reuse the warmest connection so its server-side plan cache stays hot
+            connect_args={"application_name": "options_tracker_dashboard"}
+        )
         return engine
     except Exception as e:
         st.error(f"Database connection failed: {e}")
         return None
 
+# SQL queries, defined once so SQLAlchemy's compiled cache is reused across reruns
+SNAPSHOT_DATES_QUERY = text("""
+    SELECT DISTINCT snapshot_date 
+    FROM option_anomalies 
+    ORDER BY snapshot_date DESC
+""")
+
+SYMBOLS_QUERY = text("""
+    SELECT DISTINCT s.symbol 
+    FROM stocks s
+    JOIN option_anomalies oa ON s.id = oa.stock_id
+    ORDER BY s.symbol
+""")
+
+# Cards are pre-rendered by the mv_anomaly_cards materialized view
+ANOMALY_CARDS_QUERY = text("""
+    SELECT symbol, insider_probability, card_html
+    FROM mv_anomaly_cards
+    WHERE snapshot_date = :date
+    ORDER BY insider_probability DESC
+""")
+
+RISK_SUMMARY_QUERY = text("""
+    SELECT 
+        COUNT(*) AS total,
+        COUNT(*) FILTER (WHERE insider_probability >= 0.7) AS high,
+        COUNT(*) FILTER (WHERE insider_probability >= 0.4 AND insider_probability < 0.7) AS medium,
+        COUNT(*) FILTER (WHERE insider_probability < 0.4) AS low,
+        AVG(insider_probability) AS avg_probability
+    FROM option_anomalies
+    WHERE snapshot_date = :date
+    AND (call_volume_trigger = true OR put_volume_trigger = true 
+         OR short_term_call_trigger = true OR otm_call_trigger = true 
+         OR call_oi_trigger = true)
+""")
+
+OPTION_DATA_QUERY = text("""
+    SELECT 
+        od.expiration,
+        od.strike,
+        od.option_type,
+        od.volume,
+        od.open_interest,
+        od.implied_volatility,
+        od.delta,
+        od.gamma,
+        od.theta,
+        od.vega
+    FROM option_data od
+    JOIN stocks s ON od.stock_id = s.id
+    WHERE od.snapshot_date = :date AND s.symbol = :symbol
+""")
+
+STOCK_PRICE_QUERY = text("""
+    SELECT close_price, open_price, high_price, low_price, volume
+    FROM stock_price_snapshots sps
+    JOIN stocks s ON sps.stock_id = s.id
+    WHERE sps.snapshot_date = :date AND s.symbol = :symbol
+""")
+
+# Last 30 anomalies for each requested symbol, so several timelines load in one round-trip
+TIMELINE_QUERY = text("""
+    SELECT 
+        symbol,
+        snapshot_date,
+        insider_probability,
+        unusual_activity_score,
+        call_volume_ratio,
+        put_volume_ratio
+    FROM (
+        SELECT 
+            s.symbol,
+            oa.snapshot_date,
+            oa.insider_probability,
+            oa.unusual_activity_score,
+            oa.call_volume_ratio,
+            oa.put_volume_ratio,
+            ROW_NUMBER() OVER (PARTITION BY s.symbol ORDER BY oa.snapshot_date DESC) AS recency
+        FROM option_anomalies oa
+        JOIN stocks s ON oa.stock_id = s.id
+        WHERE s.symbol IN :symbols
+    ) ranked
+    WHERE recency <= 30
+    ORDER BY symbol, snapshot_date DESC
+""").bindparams(bindparam("symbols", expanding=True))
+
+# Timelines for this many top-probability symbols are fetched alongside the selected one
+TIMELINE_PREFETCH_COUNT = 10
+
 # Data loading functions
+# Hash snapshot dates by ordinal instead of Streamlit's generic pickled-repr hashing
+DATE_HASH_FUNCS = {date: date.toordinal}
+
 @st.cache_data(ttl=3600)
 def load_snapshot_dates():
     """Load available snapshot dates."""
@@ -105,105 +252,170 @@ def load_snapshot_dates():
     
     try:
         with engine.connect() as conn:
-            result = conn.execute(text("""
-                SELECT DISTINCT snapshot_date 
-                FROM option_anomalies 
-                ORDER BY snapshot_date DESC
-            """))
+            result = conn.execute(SNAPSHOT_DATES_QUERY)
             return [row[0] for row in result]
     except Exception as e:
         st.error(f"Error loading dates: {e}")
         return []
 
-@st.cache_data(ttl=3600)
-def load_symbols():
-    """Load available symbols."""
+def _to_arrow_bytes(df):
+    """Serialize a DataFrame to Arrow IPC bytes for compact caching."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def _from_arrow_bytes(payload):
+    """Materialize a DataFrame from cached Arrow IPC bytes."""
+    return pa.ipc.open_stream(payload).read_pandas()
+
+def _fetch_rows(engine, query, params=None):
+    """Run a query on its own pooled connection and return (columns, rows)."""
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True).execute(query, params or {})
+        return list(result.keys()), result.fetchall()
+
+@st.cache_data(ttl=1800, hash_funcs=DATE_HASH_FUNCS)
+def _load_page_bundle(snapshot_date):
+    """Load symbols, anomalies (as Arrow bytes) and risk summary in one concurrent round-trip."""
     engine = get_database_connection()
     if not engine:
-        return []
+        return [], None, None
     
     try:
-        with engine.connect() as conn:
-            result = conn.execute(text("""
-                SELECT DISTINCT s.symbol 
-                FROM stocks s
-                JOIN option_anomalies oa ON s.id = oa.stock_id
-                ORDER BY s.symbol
-            """))
-            return [row[0] for row in result]
+        params = {"date": snapshot_date}
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            symbols_future = executor.submit(_fetch_rows, engine, SYMBOLS_QUERY)
+            anomalies_future = executor.submit(_fetch_rows, engine, ANOMALY_CARDS_QUERY, params)
+            summary_future = executor.submit(_fetch_rows, engine, RISK_SUMMARY_QUERY, params)
+            
+            _, symbol_rows = symbols_future.result()
+            anomaly_columns, anomaly_rows = anomalies_future.result()
+            _, summary_rows = summary_future.result()
+        
+        symbols = [row[0] for row in symbol_rows]
+        anomalies_df = pd.DataFrame(anomaly_rows, columns=anomaly_columns)
+        risk_summary = tuple(summary_rows[0]) if summary_rows else None
+        return symbols, _to_arrow_bytes(anomalies_df), risk_summary
     except Exception as e:
-        st.error(f"Error loading symbols: {e}")
-        return []
+        st.error(f"Error loading page data: {e}")
+        return [], None, None
 
-@st.cache_data(ttl=1800)
-def load_anomalies(snapshot_date):
-    """Load anomalies for a specific date."""
-    engine = get_database_connection()
-    if not engine:
-        return pd.DataFrame()
+def load_page_bundle(snapshot_date):
+    """Load symbols, anomalies and risk summary for a date."""
+    symbols, anomalies_payload, risk_summary = _load_page_bundle(snapshot_date)
+    anomalies_df = _from_arrow_bytes(anomalies_payload) if anomalies_payload else pd.DataFrame()
+    return symbols, anomalies_df, risk_summary
+
+def _read_sql_streamed(engine, query, params, parse_dates=None, chunk_size=10_000):
+    """Read a query through a server-side cursor, converting one chunk of rows at a time."""
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(query, params)
+        columns = list(result.keys())
+        chunks = [pd.DataFrame.from_records(rows, columns=columns) for rows in result.partitions()]
+    
+    df = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=columns)
+    for column in parse_dates or []:
+        df[column] = pd.to_datetime(df[column])
+    return df
+
+def _adbc_uri(engine):
+    """Postgres URI for ADBC reads, or None when ADBC can't be used."""
+    if not ADBC_AVAILABLE or engine.dialect.name != "postgresql":
+        return None
+    return engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+
+@st.cache_resource
+def get_adbc_pool():
+    """Idle ADBC connections shared by all sessions; each is checked out by one read at a time."""
+    # LIFO, like the SQLAlchemy pool, so the warmest connection is reused first
+    return queue.LifoQueue(maxsize=5)
+
+def _read_sql_adbc_pooled(uri, query, params, parse_dates=None):
+    """Read through a pooled ADBC connection, replacing it if the read fails."""
+    pool = get_adbc_pool()
+    try:
+        adbc_conn = pool.get_nowait()
+    except queue.Empty:
+        adbc_conn = adbc_pg.connect(uri, autocommit=True)
     
     try:
-        query = text("""
-            SELECT 
-                s.symbol,
-                oa.call_volume_ratio,
-                oa.put_volume_ratio,
-                oa.short_term_call_ratio,
-                oa.otm_call_ratio,
-                oa.call_oi_ratio,
-                oa.unusual_activity_score,
-                oa.insider_probability,
-                oa.notes,
-                oa.call_volume_trigger,
-                oa.put_volume_trigger,
-                oa.short_term_call_trigger,
-                oa.otm_call_trigger,
-                oa.call_oi_trigger
-            FROM option_anomalies oa
-            JOIN stocks s ON oa.stock_id = s.id
-            WHERE oa.snapshot_date = :date
-            AND (oa.call_volume_trigger = true OR oa.put_volume_trigger = true 
-                 OR oa.short_term_call_trigger = true OR oa.otm_call_trigger = true 
-                 OR oa.call_oi_trigger = true)
-            ORDER BY oa.insider_probability DESC
-        """)
-        
-        return pd.read_sql(query, engine, params={"date": snapshot_date})
-    except Exception as e:
-        st.error(f"Error loading anomalies: {e}")
-        return pd.DataFrame()
+        df = _read_sql_adbc(adbc_conn, query, params, parse_dates=parse_dates)
+    except Exception:
+        # The connection may be broken, so close it rather than hand it to the next read
+        try:
+            adbc_conn.close()
+        except Exception:
+            pass
+        raise
+    
+    try:
+        pool.put_nowait(adbc_conn)
+    except queue.Full:
+        adbc_conn.close()
+    return df
 
-@st.cache_data(ttl=1800)
-def load_option_data(snapshot_date, symbol):
-    """Load options data for a specific symbol and date."""
+def _read_sql_adbc(adbc_conn, query, params, parse_dates=None):
+    """Read a query as an Arrow table straight from libpq, skipping Python row tuples."""
+    # The asyncpg dialect renders $1-style positional parameters, which is what ADBC expects
+    compiled = query.compile(dialect=PGDialect_asyncpg())
+    with adbc_conn.cursor() as cursor:
+        cursor.execute(str(compiled), [params[name] for name in compiled.positiontup])
+        df = cursor.fetch_arrow_table().to_pandas()
+    
+    for column in parse_dates or []:
+        df[column] = pd.to_datetime(df[column])
+    return df
+
+def _read_sql_fast(engine, query, params, parse_dates=None):
+    """Read a query through the fastest available path: ADBC, then COPY, then a streamed cursor."""
+    uri = _adbc_uri(engine)
+    if uri is not None:
+        try:
+            return _read_sql_adbc_pooled(uri, query, params, parse_dates=parse_dates)
+        except Exception as e:
+            logger.warning(f"ADBC read failed, falling back to COPY: {e}")
+    if engine.dialect.driver == "psycopg2":
+        return _read_sql_copy(engine, query, params, parse_dates=parse_dates)
+    return _read_sql_streamed(engine, query, params, parse_dates=parse_dates)
+
+def _read_sql_copy(engine, query, params, parse_dates=None):
+    """Read a query through Postgres COPY so rows never become Python tuples."""
+    raw_conn = engine.raw_connection()
+    try:
+        with raw_conn.cursor() as cursor:
+            sql = cursor.mogrify(str(query.compile(dialect=engine.dialect)), params).decode()
+            buffer = io.StringIO()
+            cursor.copy_expert(f"COPY ({sql}) TO STDOUT WITH (FORMAT CSV, HEADER)", buffer)
+    finally:
+        raw_conn.close()
+    
+    buffer.seek(0)
+    return pd.read_csv(buffer, parse_dates=parse_dates)
+
+@st.cache_data(ttl=1800, hash_funcs=DATE_HASH_FUNCS)
+def _load_option_data(snapshot_date, symbol):
+    """Load options data for a specific symbol and date as Arrow bytes."""
     engine = get_database_connection()
     if not engine:
-        return pd.DataFrame()
+        return None
     
     try:
-        query = text("""
-            SELECT 
-                od.expiration,
-                od.strike,
-                od.option_type,
-                od.volume,
-                od.open_interest,
-                od.implied_volatility,
-                od.delta,
-                od.gamma,
-                od.theta,
-                od.vega
-            FROM option_data od
-            JOIN stocks s ON od.stock_id = s.id
-            WHERE od.snapshot_date = :date AND s.symbol = :symbol
-        """)
-        
-        return pd.read_sql(query, engine, params={"date": snapshot_date, "symbol": symbol})
+        option_data = _read_sql_fast(engine, OPTION_DATA_QUERY, {"date": snapshot_date, "symbol": symbol}, parse_dates=['expiration'])
+        # Greeks only feed charts, so float32 precision is plenty and halves their footprint
+        option_data[GREEK_COLUMNS] = option_data[GREEK_COLUMNS].astype(np.float32)
+        return _to_arrow_bytes(option_data)
     except Exception as e:
         st.error(f"Error loading option data: {e}")
-        return pd.DataFrame()
+        return None
 
-@st.cache_data(ttl=1800)
+def load_option_data(snapshot_date, symbol):
+    """Load options data for a specific symbol and date."""
+    payload = _load_option_data(snapshot_date, symbol)
+    return _from_arrow_bytes(payload) if payload else pd.DataFrame()
+
+@st.cache_data(ttl=1800, hash_funcs=DATE_HASH_FUNCS)
 def load_stock_price(snapshot_date, symbol):
     """Load stock price for a specific symbol and date."""
     engine = get_database_connection()
@@ -211,20 +423,26 @@ def load_stock_price(snapshot_date, symbol):
         return None
     
     try:
-        query = text("""
-            SELECT close_price, open_price, high_price, low_price, volume
-            FROM stock_price_snapshots sps
-            JOIN stocks s ON sps.stock_id = s.id
-            WHERE sps.snapshot_date = :date AND s.symbol = :symbol
-        """)
-        
-        result = engine.execute(query, {"date": snapshot_date, "symbol": symbol})
-        row = result.fetchone()
-        return row if row else None
+        with engine.connect() as conn:
+            row = conn.execute(STOCK_PRICE_QUERY, {"date": snapshot_date, "symbol": symbol}).mappings().first()
+        return dict(row) if row else None
     except Exception as e:
         st.error(f"Error loading stock price: {e}")
         return None
 
+@st.cache_data(ttl=1800)
+def load_timelines(symbols):
+    """Load recent anomaly history for a tuple of symbols."""
+    engine = get_database_connection()
+    if not engine:
+        return pd.DataFrame()
+    
+    try:
+        return pd.read_sql(TIMELINE_QUERY, engine, params={"symbols": list(symbols)})
+    except Exception as e:
+        st.error(f"Error loading timeline data: {e}")
+        return pd.DataFrame()
+
 # Main app
 def main():
     st.title("Options Tracker Dashboard")
@@ -245,8 +463,10 @@ def main():
         index=0
     )
     
+    # Symbols, anomalies and risk summary for the selected date
+    symbols, anomalies_df, risk_summary = load_page_bundle(selected_date)
+    
     # Symbol selection
-    symbols = load_symbols()
     selected_symbol = st.sidebar.selectbox(
         "Select Ticker",
         symbols,
@@ -258,62 +478,49 @@ def main():
     
     with col1:
         st.subheader("Anomaly Overview")
-        display_anomaly_overview(selected_date)
+        display_anomaly_overview(anomalies_df)
     
     with col2:
         st.subheader("Quick Stats")
-        display_quick_stats(selected_date)
+        display_quick_stats(risk_summary)
     
     # Detailed analysis
     if selected_symbol:
         st.subheader(f"Detailed Analysis: {selected_symbol}")
-        display_detailed_analysis(selected_date, selected_symbol)
+        prefetch_symbols = tuple(anomalies_df['symbol'].head(TIMELINE_PREFETCH_COUNT)) if not anomalies_df.empty else ()
+        display_detailed_analysis(selected_date, selected_symbol, prefetch_symbols)
 
-def display_anomaly_overview(snapshot_date):
+def display_anomaly_overview(anomalies_df):
     """Display anomaly overview for the selected date."""
-    anomalies_df = load_anomalies(snapshot_date)
-    
     if anomalies_df.empty:
         st.info("No anomalies detected for this date.")
         return
     
-    # Create anomaly cards
-    for _, row in anomalies_df.iterrows():
-        # Determine risk level
-        if row['insider_probability'] >= 0.7:
-            risk_class = "anomaly-high"
-            risk_emoji = "🔴"
-        elif row['insider_probability'] >= 0.4:
-            risk_class = "anomaly-medium"
-            risk_emoji = "🟡"
-        else:
-            risk_class = "anomaly-low"
-            risk_emoji = "🟢"
-        
-        with st.container():
-            st.markdown(f"""
-            <div class="metric-card {risk_class}">
-                <h4>{risk_emoji} {row['symbol']} - {row['insider_probability']:.1%} Insider Probability</h4>
-                <p><strong>Activity Score:</strong> {row['unusual_activity_score']:.2f}</p>
-                <p><strong>Notes:</strong> {row['notes']}</p>
-            </div>
-            """, unsafe_allow_html=True)
-
-def display_quick_stats(snapshot_date):
-    """Display quick statistics."""
-    anomalies_df = load_anomalies(snapshot_date)
+    st.markdown('\n'.join(anomalies_df['card_html'].tolist()), unsafe_allow_html=True)
+
+@st.cache_data(ttl=1800)
+def build_risk_chart(high: int, medium: int, low: int) -> dict:
+    """Build the risk distribution chart spec; only the three counts vary."""
+    risk_data = pd.DataFrame({
+        'Risk Level': ['High', 'Medium', 'Low'],
+        'Count': [high, medium, low],
+        'Color': ['#ff0000', '#ffa500', '#ffff00']
+    })
     
-    if anomalies_df.empty:
+    return alt.Chart(risk_data).mark_bar().encode(
+        x='Risk Level',
+        y='Count',
+        color=alt.Color('Color', scale=None)
+    ).properties(height=200).to_dict()
+
+def display_quick_stats(summary):
+    """Display quick statistics."""
+    if not summary or not summary[0]:
         st.info("No data available")
         return
     
     # Calculate stats
-    total_anomalies = len(anomalies_df)
-    high_risk = len(anomalies_df[anomalies_df['insider_probability'] >= 0.7])
-    medium_risk = len(anomalies_df[(anomalies_df['insider_probability'] >= 0.4) & (anomalies_df['insider_probability'] < 0.7)])
-    low_risk = len(anomalies_df[anomalies_df['insider_probability'] < 0.4])
-    
-    avg_probability = anomalies_df['insider_probability'].mean()
+    total_anomalies, high_risk, medium_risk, low_risk, avg_probability = summary
     
     # Display metrics
     col1, col2 = st.columns(2)
@@ -327,21 +534,9 @@ def display_quick_stats(snapshot_date):
         st.metric("Medium Risk", medium_risk, delta=f"{medium_risk/total_anomalies:.1%}" if total_anomalies > 0 else "0%")
     
     # Risk distribution chart
-    risk_data = pd.DataFrame({
-        'Risk Level': ['High', 'Medium', 'Low'],
-        'Count': [high_risk, medium_risk, low_risk],
-        'Color': ['#ff0000', '#ffa500', '#ffff00']
-    })
-    
-    chart = alt.Chart(risk_data).mark_bar().encode(
-        x='Risk Level',
-        y='Count',
-        color=alt.Color('Color', scale=None)
-    ).properties(height=200)
-    
-    st.altair_chart(chart, use_container_width=True)
+    st.vega_lite_chart(build_risk_chart(high_risk, medium_risk, low_risk), use_container_width=True)
 
-def display_detailed_analysis(snapshot_date, symbol):
+def display_detailed_analysis(snapshot_date, symbol, prefetch_symbols=()):
     """Display detailed analysis for a specific symbol."""
     option_data = load_option_data(snapshot_date, symbol)
     stock_price = load_stock_price(snapshot_date, symbol)
@@ -354,39 +549,65 @@ def display_detailed_analysis(snapshot_date, symbol):
     if stock_price:
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            st.metric("Close Price", f"${stock_price[0]:.2f}")
+            st.metric("Close Price", f"${stock_price['close_price']:.2f}")
         with col2:
-            st.metric("Volume", f"{stock_price[4]:,}")
+            st.metric("Volume", f"{stock_price['volume']:,}")
         with col3:
-            st.metric("High", f"${stock_price[2]:.2f}")
+            st.metric("High", f"${stock_price['high_price']:.2f}")
         with col4:
-            st.metric("Low", f"${stock_price[3]:.2f}")
+            st.metric("Low", f"${stock_price['low_price']:.2f}")
     
     # Options analysis tabs
     tab1, tab2, tab3, tab4 = st.tabs(["Volume Analysis", "Open Interest", "Greeks", "Timeline"])
     
+    analysis = analyze_option_data(option_data)
+    
     with tab1:
-        display_volume_analysis(option_data, symbol)
+        display_volume_analysis(analysis, symbol)
     
     with tab2:
-        display_open_interest_analysis(option_data, symbol)
+        display_open_interest_analysis(option_data, analysis, symbol)
     
     with tab3:
-        display_greeks_analysis(option_data, symbol)
+        display_greeks_analysis(analysis, symbol)
     
     with tab4:
-        display_timeline_analysis(symbol)
+        display_timeline_analysis(symbol, prefetch_symbols)
 
-def display_volume_analysis(option_data, symbol):
+def analyze_option_data(option_data):
+    """Compute the aggregates shared by the analysis tabs in one pass over option_data."""
+    totals_by_type = option_data.groupby('option_type', observed=True, sort=False).agg(
+        {'volume': 'sum', 'open_interest': 'sum'}
+    ).reset_index()
+    
+    # Volume scatter-added into a dense strike x expiration grid
+    volume = np.nan_to_num(option_data['volume'].to_numpy(dtype=np.float64))
+    strikes, strike_idx = np.unique(option_data['strike'].to_numpy(), return_inverse=True)
+    expirations, expiration_idx = np.unique(option_data['expiration'].to_numpy(), return_inverse=True)
+    volume_heatmap = np.zeros((strikes.size, expirations.size))
+    np.add.at(volume_heatmap, (strike_idx, expiration_idx), volume)
+    
+    # Rows with a complete set of Greeks
+    greeks = option_data[GREEK_COLUMNS].to_numpy(dtype=np.float32)
+    greeks_mask = ~np.isnan(greeks).any(axis=1)
+    
+    return {
+        'totals_by_type': totals_by_type,
+        'strikes': strikes,
+        'expirations': expirations,
+        'volume_heatmap': volume_heatmap,
+        'option_types': option_data['option_type'].to_numpy(),
+        'greeks': np.ascontiguousarray(greeks[greeks_mask]),
+        'greeks_mask': greeks_mask,
+    }
+
+def display_volume_analysis(analysis, symbol):
     """Display volume analysis."""
-    # Volume by option type
-    volume_by_type = option_data.groupby('option_type')['volume'].sum().reset_index()
-    
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("Volume by Option Type")
-        chart = alt.Chart(volume_by_type).mark_bar().encode(
+        chart = alt.Chart(analysis['totals_by_type']).mark_bar().encode(
             x='option_type',
             y='volume',
             color='option_type'
@@ -396,32 +617,26 @@ def display_volume_analysis(option_data, symbol):
     with col2:
         st.subheader("Volume Distribution")
         # Volume heatmap by strike and expiration
-        if not option_data.empty:
-            heatmap_data = option_data.pivot_table(
-                values='volume', 
-                index='strike', 
-                columns='expiration', 
-                aggfunc='sum'
-            ).fillna(0)
-            
-            fig = px.imshow(
-                heatmap_data,
-                title=f"Volume Heatmap - {symbol}",
-                labels=dict(x="Expiration", y="Strike", color="Volume"),
-                aspect="auto"
-            )
-            st.plotly_chart(fig, use_container_width=True)
-
-def display_open_interest_analysis(option_data, symbol):
+        fig = go.Figure(go.Heatmap(
+            z=analysis['volume_heatmap'],
+            x=analysis['expirations'],
+            y=analysis['strikes'],
+            colorbar=dict(title="Volume")
+        ))
+        fig.update_layout(
+            title=f"Volume Heatmap - {symbol}",
+            xaxis_title="Expiration",
+            yaxis_title="Strike"
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+def display_open_interest_analysis(option_data, analysis, symbol):
     """Display open interest analysis."""
-    # OI by option type
-    oi_by_type = option_data.groupby('option_type')['open_interest'].sum().reset_index()
-    
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("Open Interest by Option Type")
-        chart = alt.Chart(oi_by_type).mark_bar().encode(
+        chart = alt.Chart(analysis['totals_by_type']).mark_bar().encode(
             x='option_type',
             y='open_interest',
             color='option_type'
@@ -430,7 +645,10 @@ def display_open_interest_analysis(option_data, symbol):
     
     with col2:
         st.subheader("OI vs Volume Ratio")
-        option_data['oi_volume_ratio'] = option_data['open_interest'] / option_data['volume'].replace(0, 1)
+        volume = option_data['volume'].to_numpy(dtype=np.float64)
+        open_interest = option_data['open_interest'].to_numpy(dtype=np.float64)
+        # Zero-volume contracts keep their raw OI, as if divided by 1
+        option_data['oi_volume_ratio'] = np.divide(open_interest, volume, out=open_interest.copy(), where=volume != 0)
         
         chart = alt.Chart(option_data).mark_circle().encode(
             x='strike',
@@ -440,36 +658,59 @@ def display_open_interest_analysis(option_data, symbol):
         ).properties(height=300)
         st.altair_chart(chart, use_container_width=True)
 
-def display_greeks_analysis(option_data, symbol):
+def _histogram_by_type(values, option_types, bins=50):
+    """Pre-bin values per option type so charts only receive bin counts."""
+    edges = np.histogram_bin_edges(values, bins=bins)
+    
+    # Split values by option type with one sort instead of a boolean mask per type
+    order = np.argsort(option_types, kind='stable')
+    types, starts = np.unique(option_types[order], return_index=True)
+    counts = [np.histogram(group, bins=edges)[0] for group in np.split(values[order], starts[1:])]
+    
+    return pd.DataFrame({
+        'bin_left': np.tile(edges[:-1], len(types)),
+        'bin_right': np.tile(edges[1:], len(types)),
+        'count': np.concatenate(counts),
+        'option_type': np.repeat(types, bins),
+    })
+
+def display_greeks_analysis(analysis, symbol):
     """Display Greeks analysis."""
-    # Filter for options with Greeks data
-    greeks_data = option_data.dropna(subset=['delta', 'gamma', 'theta', 'vega'])
+    # Options with Greeks data
+    greeks = analysis['greeks']
     
-    if greeks_data.empty:
+    if greeks.size == 0:
         st.info("No Greeks data available")
         return
     
+    option_types = analysis['option_types'][analysis['greeks_mask']]
+    
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("Delta Distribution")
-        chart = alt.Chart(greeks_data).mark_histogram().encode(
-            x='delta',
+        chart = alt.Chart(_histogram_by_type(greeks[:, 0], option_types)).mark_bar().encode(
+            x=alt.X('bin_left:Q', title='delta'),
+            x2='bin_right:Q',
+            y='count:Q',
             color='option_type'
         ).properties(height=250)
         st.altair_chart(chart, use_container_width=True)
     
     with col2:
         st.subheader("Gamma Distribution")
-        chart = alt.Chart(greeks_data).mark_histogram().encode(
-            x='gamma',
+        chart = alt.Chart(_histogram_by_type(greeks[:, 1], option_types)).mark_bar().encode(
+            x=alt.X('bin_left:Q', title='gamma'),
+            x2='bin_right:Q',
+            y='count:Q',
             color='option_type'
         ).properties(height=250)
         st.altair_chart(chart, use_container_width=True)
     
     # Greeks correlation
     st.subheader("Greeks Correlation Matrix")
-    greeks_corr = greeks_data[['delta', 'gamma', 'theta', 'vega']].corr()
+    correlation = _corr4_jit(greeks) if _corr4_jit is not None else np.corrcoef(greeks, rowvar=False)
+    greeks_corr = pd.DataFrame(correlation, index=GREEK_COLUMNS, columns=GREEK_COLUMNS)
     
     fig = px.imshow(
         greeks_corr,
@@ -479,32 +720,15 @@ def display_greeks_analysis(option_data, symbol):
     )
     st.plotly_chart(fig, use_container_width=True)
 
-def display_timeline_analysis(symbol):
+def display_timeline_analysis(symbol, prefetch_symbols=()):
     """Display timeline analysis."""
     st.subheader("Historical Anomaly Timeline")
     
-    # Load historical anomalies for this symbol
-    engine = get_database_connection()
-    if not engine:
-        st.error("Database connection failed")
-        return
+    # Top anomaly symbols share one cached query, so switching between them needs no round-trip
+    timelines = load_timelines(prefetch_symbols if symbol in prefetch_symbols else (symbol,))
     
     try:
-        query = text("""
-            SELECT 
-                oa.snapshot_date,
-                oa.insider_probability,
-                oa.unusual_activity_score,
-                oa.call_volume_ratio,
-                oa.put_volume_ratio
-            FROM option_anomalies oa
-            JOIN stocks s ON oa.stock_id = s.id
-            WHERE s.symbol = :symbol
-            ORDER BY oa.snapshot_date DESC
-            LIMIT 30
-        """)
-        
-        timeline_data = pd.read_sql(query, engine, params={"symbol": symbol})
+        timeline_data = timelines[timelines['symbol'] == symbol] if not timelines.empty else timelines
         
         if timeline_data.empty:
             st.info("No historical data available")
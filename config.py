@@ -34,12 +34,22 @@ class Config:
     REQUEST_TIMEOUT = int(os.getenv("REQUEST_TIMEOUT", "30"))
     BATCH_SIZE = int(os.getenv("BATCH_SIZE", "50"))
     RATE_LIMIT_DELAY = float(os.getenv("RATE_LIMIT_DELAY", "0.1"))
+    # Opt-in (e.g. for development re-runs): cached responses skip freshness checks and files are never evicted
+    RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "false").lower() == "true"
+    RESPONSE_CACHE_DIR = os.getenv("RESPONSE_CACHE_DIR", ".cache")  # on-disk data-source response cache
+    RESPONSE_CACHE_TTL_MINUTES = int(os.getenv("RESPONSE_CACHE_TTL_MINUTES", "15"))
+    MAX_CONCURRENT_FETCHES = int(os.getenv("MAX_CONCURRENT_FETCHES", "8"))
+    HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "true").lower() == "true"  # used when httpx[http2] is installed
+    # Expirations fetched per symbol; each one is a chain request per source tried, so these scale run time and quota
+    WEEKLY_EXPIRATIONS = int(os.getenv("WEEKLY_EXPIRATIONS", "1"))
+    MONTHLY_EXPIRATIONS = int(os.getenv("MONTHLY_EXPIRATIONS", "3"))
     
     # Anomaly Detection Settings
     VOLUME_THRESHOLD = float(os.getenv("VOLUME_THRESHOLD", "3.0"))  # 3x average volume
     OI_THRESHOLD = float(os.getenv("OI_THRESHOLD", "2.5"))  # 2.5x average OI
     SHORT_TERM_DAYS = int(os.getenv("SHORT_TERM_DAYS", "7"))
     OTM_PERCENTAGE = float(os.getenv("OTM_PERCENTAGE", "10.0"))  # 10% OTM
+    DETECTION_WORKERS = int(os.getenv("DETECTION_WORKERS", str(os.cpu_count() or 1)))  # processes for baselines
     
     # Market Hours (EST)
     MARKET_OPEN_HOUR = 9
@@ -1,9 +1,17 @@
+import csv
+import io
 import logging
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import defaultdict
 from datetime import date, datetime, timedelta
 from typing import List, Dict, Optional
+import numpy as np
 import pandas as pd
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, column, func, or_, select, table, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import selectinload
 
 from config import config
 from database.connection import db_manager
@@ -15,12 +23,111 @@ from utils.notifications import NotificationManager
 
 logger = logging.getLogger(__name__)
 
+# date(1970, 1, 1).toordinal(), to turn datetime64 day counts into date ordinals
+EPOCH_ORDINAL = 719163
+
+# Pending option rows (across symbols) that trigger a write from the processing loop
+OPTION_WRITE_BATCH_SIZE = 5000
+
+# Option columns refreshed when a contract is re-fetched for the same snapshot date
+OPTION_UPDATE_COLUMNS = (
+    'last_price', 'bid', 'ask', 'volume', 'open_interest', 'implied_volatility',
+    'delta', 'gamma', 'theta', 'vega', 'data_source'
+)
+
+# Option columns written per contract, in the order they are COPYed into the staging table
+OPTION_COPY_COLUMNS = (
+    'stock_id', 'contract_symbol', 'expiration', 'strike', 'option_type', 'last_price', 'bid', 'ask',
+    'volume', 'open_interest', 'implied_volatility', 'delta', 'gamma', 'theta', 'vega',
+    'snapshot_date', 'data_source'
+)
+
+# NULL marker for COPY, so NULL and '' stay distinct
+COPY_NULL = r'\N'
+
+# Per-connection temp table that COPY loads into before merging into option_data
+OPTION_STAGE = table('option_data_stage', *[column(name) for name in OPTION_COPY_COLUMNS])
+CREATE_OPTION_STAGE = text(f"""
+    CREATE TEMP TABLE IF NOT EXISTS option_data_stage ON COMMIT DELETE ROWS AS
+    SELECT {', '.join(OPTION_COPY_COLUMNS)} FROM option_data WITH NO DATA
+""")
+
+# Anomaly columns copied from AnomalyResult and refreshed on re-detection
+ANOMALY_RESULT_COLUMNS = (
+    'call_volume', 'call_volume_baseline', 'call_volume_ratio', 'call_volume_trigger',
+    'put_volume', 'put_volume_baseline', 'put_volume_ratio', 'put_volume_trigger',
+    'short_term_call_volume', 'short_term_call_baseline', 'short_term_call_ratio', 'short_term_call_trigger',
+    'otm_call_volume', 'otm_call_baseline', 'otm_call_ratio', 'otm_call_trigger',
+    'call_oi_delta', 'call_oi_baseline', 'call_oi_ratio', 'call_oi_trigger',
+    'unusual_activity_score', 'insider_probability', 'notes'
+)
+
+def _upsert(insert, model, index_elements, update_columns):
+    """INSERT ... ON CONFLICT DO UPDATE refreshing update_columns, executed with a list of row dicts."""
+    stmt = insert(model)
+    return stmt.on_conflict_do_update(
+        index_elements=index_elements,
+        set_={**{column: stmt.excluded[column] for column in update_columns}, 'updated_at': func.now()},
+        # Re-fetched rows that are unchanged are left alone instead of rewritten
+        where=or_(*(model.__table__.c[column].is_distinct_from(stmt.excluded[column]) for column in update_columns))
+    )
+
+# Statements are built once at import so SQLAlchemy compiles each one once and reuses the cached form.
+# Upserts are keyed by dialect name; both PostgreSQL and SQLite support ON CONFLICT.
+OPTION_UPSERTS = {
+    dialect: _upsert(insert, OptionData, [OptionData.contract_symbol, OptionData.snapshot_date],
+                     OPTION_UPDATE_COLUMNS)
+    for dialect, insert in (("postgresql", pg_insert), ("sqlite", sqlite_insert))
+}
+ANOMALY_UPSERTS = {
+    dialect: _upsert(insert, OptionAnomaly, [OptionAnomaly.stock_id, OptionAnomaly.snapshot_date],
+                     ANOMALY_RESULT_COLUMNS)
+    for dialect, insert in (("postgresql", pg_insert), ("sqlite", sqlite_insert))
+}
+
+OPTION_STAGE_MERGE = _upsert(
+    lambda model: pg_insert(model).from_select(OPTION_COPY_COLUMNS, select(OPTION_STAGE)),
+    OptionData, [OptionData.contract_symbol, OptionData.snapshot_date], OPTION_UPDATE_COLUMNS
+)
+
+PRICE_SNAPSHOT_IDS_QUERY = select(StockPriceSnapshot.stock_id, StockPriceSnapshot.id).where(
+    StockPriceSnapshot.snapshot_date == bindparam('snapshot_date')
+)
+
+STOCKS_WITH_PRICES_QUERY = select(Stock, StockPriceSnapshot.close_price).join(StockPriceSnapshot).where(
+    StockPriceSnapshot.snapshot_date == bindparam('snapshot_date')
+)
+
+TODAY_OPTIONS_QUERY = select(
+    OptionData.stock_id, OptionData.expiration, OptionData.strike, OptionData.option_type,
+    OptionData.volume, OptionData.open_interest, OptionData.implied_volatility
+).where(OptionData.snapshot_date == bindparam('snapshot_date'))
+
+# Only the columns the detector uses
+HISTORICAL_OPTIONS_QUERY = select(
+    OptionData.stock_id, OptionData.expiration, OptionData.strike, OptionData.option_type,
+    OptionData.volume, OptionData.open_interest, OptionData.snapshot_date
+).where(
+    OptionData.snapshot_date >= bindparam('start_date'),
+    OptionData.snapshot_date < bindparam('end_date'),
+    OptionData.volume > 0  # Only include active options
+)
+
 class OptionsTracker:
     """Main options tracking system with improved architecture."""
     
     def __init__(self):
         self.notification_manager = NotificationManager()
         self.session = None
+        self._stock_cache: Dict[str, Stock] = {}
+        self._log_buffer: List[Dict] = []
+        self._expiration_cache: Dict[str, list] = {}
+        self._price_snapshot_ids: Dict[int, int] = {}
+        self._price_inserts: Dict[int, Dict] = {}
+        self._price_updates: Dict[int, Dict] = {}
+        self._pending_options: Dict[str, Dict] = {}
+        self._pending_symbols: set = set()
+        self._chain_executor: Optional[ThreadPoolExecutor] = None
     
     def run_daily_analysis(self, symbols: List[str] = None, target_date: date = None):
         """Run daily options analysis for all symbols."""
@@ -36,71 +143,138 @@ class OptionsTracker:
         processed_count = 0
         error_count = 0
         
+        # option_data is range-partitioned by month; the day's partition must exist before the first write
+        db_manager.ensure_option_partitions(target_date)
+        
         with db_manager.get_session() as session:
             self.session = session
             
-            for i, symbol in enumerate(symbols):
-                try:
-                    logger.info(f"Processing {symbol} ({i+1}/{len(symbols)})")
-                    
-                    # Process single symbol
-                    success = self._process_symbol(symbol, target_date)
+            # Preload the (near-static) stocks table so lookups don't hit the DB per symbol
+            self._stock_cache = {stock.symbol: stock for stock in session.query(Stock).all()}
+            self._expiration_cache = {}
+            
+            # The day's existing price snapshots, so each store decides insert vs update without a probe query
+            self._price_snapshot_ids = dict(
+                session.execute(PRICE_SNAPSHOT_IDS_QUERY, {'snapshot_date': target_date}).all()
+            )
+            
+            # Fetch symbols concurrently; this thread is the single writer since the session isn't thread-safe,
+            # and it writes options in large batches while the workers keep fetching
+            # A separate pool fans out each symbol's expiration chains (sharing one pool could deadlock)
+            with ThreadPoolExecutor(max_workers=config.MAX_CONCURRENT_FETCHES) as executor, \
+                    ThreadPoolExecutor(max_workers=config.MAX_CONCURRENT_FETCHES) as chain_executor:
+                self._chain_executor = chain_executor
+                futures = {
+                    executor.submit(self._fetch_symbol, symbol, target_date): symbol
+                    for symbol in symbols
+                }
+                
+                n_symbols = len(symbols)
+                for i, future in enumerate(as_completed(futures)):
+                    symbol = futures[future]
+                    try:
+                        if logger.isEnabledFor(logging.DEBUG):
+                            logger.debug("Processing %s (%d/%d)", symbol, i + 1, n_symbols)
+                        
+                        # Store the fetched symbol data
+                        success = self._store_symbol(symbol, future.result(), target_date)
+                        
+                        if success:
+                            processed_count += 1
+                        else:
+                            error_count += 1
+                        
+                        # Log progress every 100 symbols
+                        if (i + 1) % 100 == 0:
+                            logger.info(f"Progress: {i+1}/{n_symbols} symbols processed")
                     
-                    if success:
-                        processed_count += 1
-                    else:
+                    except Exception as e:
+                        logger.error(f"Error processing {symbol}: {e}")
                         error_count += 1
+                        self._log_data_source_error("options_tracker", "process_symbol", symbol, str(e))
                     
-                    # Rate limiting
-                    time.sleep(config.RATE_LIMIT_DELAY)
-                    
-                    # Log progress every 100 symbols
-                    if (i + 1) % 100 == 0:
-                        logger.info(f"Progress: {i+1}/{len(symbols)} symbols processed")
-                
-                except Exception as e:
-                    logger.error(f"Error processing {symbol}: {e}")
-                    error_count += 1
-                    self._log_data_source_error("options_tracker", "process_symbol", symbol, str(e))
+                    # Write options once enough rows are pending; a failed batch is charged to every symbol in it
+                    if len(self._pending_options) >= OPTION_WRITE_BATCH_SIZE:
+                        failed_symbols = self._flush_options_batch()
+                        processed_count -= len(failed_symbols)
+                        error_count += len(failed_symbols)
+            
+            # Write the remaining options and collected stock prices before detection reads them
+            failed_symbols = self._flush_options_batch()
+            processed_count -= len(failed_symbols)
+            error_count += len(failed_symbols)
+            self._flush_stock_prices()
             
             # Detect anomalies for all processed symbols
             self._detect_anomalies_for_date(target_date)
+            anomaly_detector.clear_baseline_cache()
+            self._refresh_anomaly_cards()
             
             # Send alerts
             self._send_daily_alerts(target_date)
+            
+            execution_time = time.time() - start_time
+            
+            # Log completion and write all buffered log rows in one statement
+            self._log_data_source_success("options_tracker", "daily_analysis", 
+                                        records_processed=processed_count,
+                                        execution_time=execution_time)
+            session.bulk_insert_mappings(DataSourceLog, self._log_buffer)
+            self._log_buffer.clear()
+        
+        self._stock_cache.clear()
+        self._expiration_cache.clear()
+        self._price_snapshot_ids.clear()
+        self._pending_options.clear()
+        self._pending_symbols.clear()
         
-        execution_time = time.time() - start_time
         logger.info(f"Daily analysis completed in {execution_time:.2f}s")
         logger.info(f"Processed: {processed_count}, Errors: {error_count}")
+    
+    def _fetch_symbol(self, symbol: str, target_date: date):
+        """Fetch a symbol's stock price and options chains (network only, safe to run in a worker thread)."""
+        # Pacing is left to the per-source rate limiter, which every HTTP call goes through
+        # Get stock price
+        stock_data = data_source_manager.get_stock_price(symbol, target_date)
+        if not stock_data:
+            logger.warning(f"No stock price data for {symbol}")
+            return None
+        
+        # Get available expiration dates (stable within a run, so fetched once per symbol)
+        expirations = self._expiration_cache.get(symbol)
+        if expirations is None:
+            expirations = data_source_manager.get_available_expirations(symbol)
+            self._expiration_cache[symbol] = expirations
+        
+        # Fetch options data for each expiration concurrently; chains are independent requests
+        options_chains = [
+            options_data
+            for options_data in self._chain_executor.map(
+                lambda expiration: data_source_manager.get_options_data(symbol, expiration), expirations
+            )
+            if options_data
+        ]
         
-        # Log completion
-        self._log_data_source_success("options_tracker", "daily_analysis", 
-                                    records_processed=processed_count,
-                                    execution_time=execution_time)
+        return stock_data, options_chains
     
-    def _process_symbol(self, symbol: str, target_date: date) -> bool:
-        """Process a single symbol's options data."""
+    def _store_symbol(self, symbol: str, fetched, target_date: date) -> bool:
+        """Store a symbol's fetched stock price and options data."""
+        if fetched is None:
+            return False
+        
+        stock_data, options_chains = fetched
         try:
             # Get or create stock record
             stock = self._get_or_create_stock(symbol)
             
-            # Get stock price
-            stock_data = data_source_manager.get_stock_price(symbol, target_date)
-            if not stock_data:
-                logger.warning(f"No stock price data for {symbol}")
-                return False
-            
             # Store stock price snapshot
             self._store_stock_price(stock, stock_data, target_date)
             
-            # Get available expiration dates
-            expirations = data_source_manager.get_available_expirations(symbol)
-            
-            # Process options data for each expiration
-            for expiration in expirations:
-                options_data = data_source_manager.get_options_data(symbol, expiration)
-                if options_data:
-                    self._store_options_data(stock, options_data, target_date)
+            # Queue options data for each expiration; run_daily_analysis writes them in batches
+            for options_data in options_chains:
+                self._store_options_data(stock, options_data, target_date)
+            if options_chains:
+                self._pending_symbols.add(symbol)
             
             return True
             
@@ -110,7 +284,7 @@ class OptionsTracker:
     
     def _get_or_create_stock(self, symbol: str) -> Stock:
         """Get or create a stock record."""
-        stock = self.session.query(Stock).filter_by(symbol=symbol).first()
+        stock = self._stock_cache.get(symbol)
         
         if not stock:
             stock = Stock(
@@ -119,163 +293,221 @@ class OptionsTracker:
             )
             self.session.add(stock)
             self.session.flush()  # Get the ID
+            self._stock_cache[symbol] = stock
         
         return stock
     
     def _store_stock_price(self, stock: Stock, stock_data, target_date: date):
         """Store stock price snapshot."""
-        # Check if we already have data for this date
-        existing = self.session.query(StockPriceSnapshot).filter_by(
-            stock_id=stock.id,
-            snapshot_date=target_date
-        ).first()
-        
-        if existing:
-            # Update existing record
-            existing.close_price = stock_data.close_price
-            existing.open_price = stock_data.open_price
-            existing.high_price = stock_data.high_price
-            existing.low_price = stock_data.low_price
-            existing.volume = stock_data.volume
-            existing.data_source = "polygon"  # or get from stock_data
+        values = {
+            'close_price': stock_data.close_price,
+            'open_price': stock_data.open_price,
+            'high_price': stock_data.high_price,
+            'low_price': stock_data.low_price,
+            'volume': stock_data.volume,
+            'data_source': "polygon"  # or get from stock_data
+        }
+        
+        # Collected per stock and written in bulk by _flush_stock_prices
+        snapshot_id = self._price_snapshot_ids.get(stock.id)
+        if snapshot_id is not None:
+            self._price_updates[stock.id] = {'id': snapshot_id, **values}
         else:
-            # Create new record
-            snapshot = StockPriceSnapshot(
-                stock_id=stock.id,
-                snapshot_date=target_date,
-                close_price=stock_data.close_price,
-                open_price=stock_data.open_price,
-                high_price=stock_data.high_price,
-                low_price=stock_data.low_price,
-                volume=stock_data.volume,
-                data_source="polygon"  # or get from stock_data
-            )
-            self.session.add(snapshot)
+            self._price_inserts[stock.id] = {'stock_id': stock.id, 'snapshot_date': target_date, **values}
+    
+    def _flush_stock_prices(self):
+        """Write collected stock price snapshots with one bulk insert and one bulk update."""
+        if self._price_inserts:
+            self.session.bulk_insert_mappings(StockPriceSnapshot, list(self._price_inserts.values()))
+        if self._price_updates:
+            self.session.bulk_update_mappings(StockPriceSnapshot, list(self._price_updates.values()))
+        
+        self._price_inserts.clear()
+        self._price_updates.clear()
     
     def _store_options_data(self, stock: Stock, options_data: List, target_date: date):
-        """Store options data."""
+        """Queue options data for the next batched write."""
         # Validate options data before storage
         validated_data = self._validate_options_data(options_data)
         
-        for option in validated_data:
-            # Check if we already have this contract for this date
-            existing = self.session.query(OptionData).filter_by(
-                contract_symbol=option.contract_symbol,
-                snapshot_date=target_date
-            ).first()
-            
-            if existing:
-                # Update existing record
-                existing.last_price = option.last_price
-                existing.bid = option.bid
-                existing.ask = option.ask
-                existing.volume = option.volume
-                existing.open_interest = option.open_interest
-                existing.implied_volatility = option.implied_volatility
-                existing.delta = option.delta
-                existing.gamma = option.gamma
-                existing.theta = option.theta
-                existing.vega = option.vega
-                existing.data_source = getattr(option, 'data_source', 'unknown')
-            else:
-                # Create new record
-                option_record = OptionData(
-                    stock_id=stock.id,
-                    contract_symbol=option.contract_symbol,
-                    expiration=option.expiration,
-                    strike=option.strike,
-                    option_type=option.option_type,
-                    last_price=option.last_price,
-                    bid=option.bid,
-                    ask=option.ask,
-                    volume=option.volume,
-                    open_interest=option.open_interest,
-                    implied_volatility=option.implied_volatility,
-                    delta=option.delta,
-                    gamma=option.gamma,
-                    theta=option.theta,
-                    vega=option.vega,
-                    snapshot_date=target_date,
-                    data_source=getattr(option, 'data_source', 'unknown')
-                )
-                self.session.add(option_record)
+        # Keyed by contract so a repeated contract keeps its last values, as one upsert can't touch a row twice
+        self._pending_options.update({
+            option.contract_symbol: {
+                'stock_id': stock.id,
+                'contract_symbol': option.contract_symbol,
+                'expiration': option.expiration,
+                'strike': option.strike,
+                'option_type': option.option_type,
+                'last_price': option.last_price,
+                'bid': option.bid,
+                'ask': option.ask,
+                'volume': option.volume,
+                'open_interest': option.open_interest,
+                'implied_volatility': option.implied_volatility,
+                'delta': option.delta,
+                'gamma': option.gamma,
+                'theta': option.theta,
+                'vega': option.vega,
+                'snapshot_date': target_date,
+                'data_source': getattr(option, 'data_source', 'unknown')
+            }
+            for option in validated_data
+        })
+    
+    def _flush_options_batch(self) -> List[str]:
+        """Write all pending option rows in a savepoint; returns the symbols whose rows were lost if it failed."""
+        symbols = sorted(self._pending_symbols)
+        self._pending_symbols.clear()
+        
+        try:
+            # Only this batch is rolled back on failure; the run's other writes and the session stay usable
+            with self.session.begin_nested():
+                self._flush_options_data()
+            return []
+        except Exception as e:
+            self._pending_options.clear()
+            logger.error(f"Failed to write options for {len(symbols)} symbols ({', '.join(symbols)}): {e}")
+            self._log_data_source_error("options_tracker", "write_options", None,
+                                        f"{e} (symbols: {', '.join(symbols)})")
+            return symbols
+    
+    def _flush_options_data(self):
+        """Write all pending option rows."""
+        payload = list(self._pending_options.values())
+        self._pending_options.clear()
+        if not payload:
+            return
+        
+        # COPY is much cheaper than INSERT for the mostly-new rows of a daily load
+        bind = self.session.get_bind()
+        if bind.dialect.name == "postgresql" and bind.dialect.driver == "psycopg2":
+            self._bulk_copy_options(payload)
+            return
+        
+        self.session.execute(OPTION_UPSERTS[bind.dialect.name], payload)
+    
+    def _bulk_copy_options(self, rows: List[Dict]):
+        """COPY option rows into the staging table, then upsert them into option_data in one statement."""
+        if not rows:
+            return
+        
+        # None is written as an explicit \N so empty strings still load as '', as on the executemany path
+        buf = io.StringIO()
+        csv.writer(buf).writerows(
+            [COPY_NULL if row[name] is None else row[name] for name in OPTION_COPY_COLUMNS] for row in rows
+        )
+        buf.seek(0)
+        
+        self.session.execute(CREATE_OPTION_STAGE)
+        cursor = self.session.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY option_data_stage ({', '.join(OPTION_COPY_COLUMNS)}) FROM STDIN "
+                f"WITH (FORMAT csv, NULL '{COPY_NULL}')", buf
+            )
+        finally:
+            cursor.close()
+        
+        self.session.execute(OPTION_STAGE_MERGE)
+        self.session.execute(text("TRUNCATE option_data_stage"))
     
     def _detect_anomalies_for_date(self, target_date: date):
         """Detect anomalies for all symbols on a given date."""
         logger.info(f"Detecting anomalies for {target_date}")
         
-        # Get all stocks with data for this date
-        stocks_with_data = self.session.query(Stock).join(StockPriceSnapshot).filter(
-            StockPriceSnapshot.snapshot_date == target_date
-        ).all()
+        # Get all stocks with data for this date, with their prices, in one query
+        price_by_stock = {}
+        stocks = []
+        for stock, close_price in self.session.execute(STOCKS_WITH_PRICES_QUERY, {'snapshot_date': target_date}):
+            price_by_stock[stock.id] = close_price
+            stocks.append(stock)
         
-        for stock in stocks_with_data:
-            try:
-                # Get stock price
-                price_snapshot = self.session.query(StockPriceSnapshot).filter_by(
-                    stock_id=stock.id,
-                    snapshot_date=target_date
-                ).first()
-                
-                if not price_snapshot:
-                    continue
-                
-                # Get options data for this date
-                options_data = self.session.query(OptionData).filter_by(
-                    stock_id=stock.id,
-                    snapshot_date=target_date
-                ).all()
-                
-                # Get historical data for baseline calculation
-                historical_data = self._get_historical_data(stock.id, target_date)
-                
-                # Detect anomalies
-                anomaly_result = anomaly_detector.detect_anomalies(
-                    stock.symbol,
-                    target_date,
-                    options_data,
-                    price_snapshot.close_price,
-                    historical_data
-                )
-                
-                # Store anomaly result
-                self._store_anomaly_result(stock, anomaly_result)
-                
-            except Exception as e:
-                logger.error(f"Error detecting anomalies for {stock.symbol}: {e}")
+        if not stocks:
+            return
+        
+        # Get all of today's options in one query, grouped by stock
+        options_by_stock = defaultdict(list)
+        for option in self.session.execute(TODAY_OPTIONS_QUERY, {'snapshot_date': target_date}):
+            options_by_stock[option.stock_id].append(option)
+        
+        # Get historical data for baseline calculation, split per stock
+        historical_data = self._get_historical_data(target_date)
+        historical_by_stock = (
+            dict(tuple(historical_data.groupby('stock_id', sort=False))) if not historical_data.empty else {}
+        )
+        
+        # Detect anomalies for every stock in one batch; symbols that fail are left out of the results
+        try:
+            anomaly_results = anomaly_detector.detect_anomalies_batch(
+                target_date,
+                {stock.symbol: options_by_stock.get(stock.id, []) for stock in stocks},
+                {stock.symbol: price_by_stock[stock.id] for stock in stocks},
+                {stock.symbol: historical_by_stock.get(stock.id) for stock in stocks}
+            )
+        except Exception as e:
+            # Something broke the shared pass itself, so detect each stock on its own
+            logger.error(f"Error detecting anomalies for {target_date}, retrying per symbol: {e}")
+            anomaly_results = {}
+            for stock in stocks:
+                try:
+                    anomaly_results[stock.symbol] = anomaly_detector.detect_anomalies(
+                        stock.symbol,
+                        target_date,
+                        options_by_stock.get(stock.id, []),
+                        price_by_stock[stock.id],
+                        historical_by_stock.get(stock.id)
+                    )
+                except Exception as e:
+                    logger.error(f"Error detecting anomalies for {stock.symbol}: {e}")
+        
+        # Store the anomaly results of every stock that was scored
+        self._store_anomaly_rows([
+            self._anomaly_to_row(stock, anomaly_results[stock.symbol])
+            for stock in stocks
+            if stock.symbol in anomaly_results
+        ])
     
-    def _get_historical_data(self, stock_id: int, target_date: date, days: int = 30) -> pd.DataFrame:
-        """Get historical options data for baseline calculation."""
+    def _refresh_anomaly_cards(self):
+        """Refresh the pre-rendered anomaly cards read by the dashboard."""
+        try:
+            # Savepoint so a failed refresh doesn't abort the day's transaction
+            with self.session.begin_nested():
+                self.session.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY mv_anomaly_cards"))
+        except Exception as e:
+            logger.error(f"Error refreshing anomaly cards: {e}")
+    
+    def _get_historical_data(self, target_date: date, days: int = 30) -> pd.DataFrame:
+        """Get historical options data for all stocks for baseline calculation."""
         # Increase from 14 to 30 days for better baseline
         start_date = target_date - timedelta(days=days)
         
-        # Add more sophisticated filtering
-        query = self.session.query(OptionData).filter(
-            OptionData.stock_id == stock_id,
-            OptionData.snapshot_date >= start_date,
-            OptionData.snapshot_date < target_date,
-            OptionData.volume > 0  # Only include active options
+        # Read straight into column arrays (no ORM objects)
+        historical_data = pd.read_sql_query(
+            HISTORICAL_OPTIONS_QUERY, self.session.connection(),
+            params={'start_date': start_date, 'end_date': target_date},
+            parse_dates=['expiration', 'snapshot_date']
         )
         
-        results = query.all()
-        
-        if not results:
+        if historical_data.empty:
             return pd.DataFrame()
         
-        # Convert to DataFrame with better structure
-        data = []
-        for result in results:
-            data.append({
-                'expiration': result.expiration,
-                'strike': result.strike,
-                'option_type': result.option_type,
-                'volume': result.volume,
-                'open_interest': result.open_interest,
-                'snapshot_date': result.snapshot_date,
-                'days_to_expiration': (result.expiration - result.snapshot_date).days
-            })
-        
-        return pd.DataFrame(data)
+        historical_data['open_interest'] = historical_data['open_interest'].fillna(0)
+        historical_data = historical_data.astype({
+            'stock_id': np.int64, 'strike': np.float64, 'volume': np.int64, 'open_interest': np.int64
+        })
+        
+        # Day ordinals (date.toordinal) computed on the datetime64 columns
+        expiration_days = self._to_ordinal_days(historical_data['expiration'])
+        snapshot_days = self._to_ordinal_days(historical_data['snapshot_date'])
+        historical_data['days_to_expiration'] = expiration_days - snapshot_days
+        historical_data['expiration_days'] = expiration_days
+        
+        return historical_data
+    
+    @staticmethod
+    def _to_ordinal_days(dates: pd.Series) -> np.ndarray:
+        """Convert a datetime64 column to proleptic Gregorian ordinals, as date.toordinal() does."""
+        return (dates.to_numpy().astype('datetime64[D]').astype(np.int64) + EPOCH_ORDINAL).astype(np.int32)
     
     def _validate_options_data(self, options_data: List) -> List:
         """Validate options data before storage."""
@@ -293,80 +525,24 @@ class OptionsTracker:
         
         return validated_data
 
-    def _store_anomaly_result(self, stock: Stock, anomaly_result):
-        """Store anomaly detection result."""
-        # Check if we already have an anomaly record for this date
-        existing = self.session.query(OptionAnomaly).filter_by(
-            stock_id=stock.id,
-            snapshot_date=anomaly_result.snapshot_date
-        ).first()
-        
-        if existing:
-            # Update existing record
-            existing.call_volume = anomaly_result.call_volume
-            existing.call_volume_baseline = anomaly_result.call_volume_baseline
-            existing.call_volume_ratio = anomaly_result.call_volume_ratio
-            existing.call_volume_trigger = anomaly_result.call_volume_trigger
-            existing.put_volume = anomaly_result.put_volume
-            existing.put_volume_baseline = anomaly_result.put_volume_baseline
-            existing.put_volume_ratio = anomaly_result.put_volume_ratio
-            existing.put_volume_trigger = anomaly_result.put_volume_trigger
-            existing.short_term_call_volume = anomaly_result.short_term_call_volume
-            existing.short_term_call_baseline = anomaly_result.short_term_call_baseline
-            existing.short_term_call_ratio = anomaly_result.short_term_call_ratio
-            existing.short_term_call_trigger = anomaly_result.short_term_call_trigger
-            existing.otm_call_volume = anomaly_result.otm_call_volume
-            existing.otm_call_baseline = anomaly_result.otm_call_baseline
-            existing.otm_call_ratio = anomaly_result.otm_call_ratio
-            existing.otm_call_trigger = anomaly_result.otm_call_trigger
-            existing.call_oi_delta = anomaly_result.call_oi_delta
-            existing.call_oi_baseline = anomaly_result.call_oi_baseline
-            existing.call_oi_ratio = anomaly_result.call_oi_ratio
-            existing.call_oi_trigger = anomaly_result.call_oi_trigger
-            existing.unusual_activity_score = anomaly_result.unusual_activity_score
-            existing.insider_probability = anomaly_result.insider_probability
-            existing.notes = anomaly_result.notes
-        else:
-            # Create new record
-            anomaly = OptionAnomaly(
-                stock_id=stock.id,
-                snapshot_date=anomaly_result.snapshot_date,
-                call_volume=anomaly_result.call_volume,
-                call_volume_baseline=anomaly_result.call_volume_baseline,
-                call_volume_ratio=anomaly_result.call_volume_ratio,
-                call_volume_trigger=anomaly_result.call_volume_trigger,
-                put_volume=anomaly_result.put_volume,
-                put_volume_baseline=anomaly_result.put_volume_baseline,
-                put_volume_ratio=anomaly_result.put_volume_ratio,
-                put_volume_trigger=anomaly_result.put_volume_trigger,
-                short_term_call_volume=anomaly_result.short_term_call_volume,
-                short_term_call_baseline=anomaly_result.short_term_call_baseline,
-                short_term_call_ratio=anomaly_result.short_term_call_ratio,
-                short_term_call_trigger=anomaly_result.short_term_call_trigger,
-                otm_call_volume=anomaly_result.otm_call_volume,
-                otm_call_baseline=anomaly_result.otm_call_baseline,
-                otm_call_ratio=anomaly_result.otm_call_ratio,
-                otm_call_trigger=anomaly_result.otm_call_trigger,
-                call_oi_delta=anomaly_result.call_oi_delta,
-                call_oi_baseline=anomaly_result.call_oi_baseline,
-                call_oi_ratio=anomaly_result.call_oi_ratio,
-                call_oi_trigger=anomaly_result.call_oi_trigger,
-                unusual_activity_score=anomaly_result.unusual_activity_score,
-                insider_probability=anomaly_result.insider_probability,
-                notes=anomaly_result.notes
-            )
-            self.session.add(anomaly)
+    def _anomaly_to_row(self, stock: Stock, anomaly_result) -> Dict:
+        """Convert an anomaly detection result into an option_anomalies row."""
+        row = {column: getattr(anomaly_result, column) for column in ANOMALY_RESULT_COLUMNS}
+        row['stock_id'] = stock.id
+        row['snapshot_date'] = anomaly_result.snapshot_date
+        return row
+    
+    def _store_anomaly_rows(self, anomaly_rows: List[Dict]):
+        """Store anomaly detection results with bulk upserts."""
+        if anomaly_rows:
+            self.session.execute(ANOMALY_UPSERTS[self.session.get_bind().dialect.name], anomaly_rows)
     
     def _send_daily_alerts(self, target_date: date):
         """Send daily anomaly alerts."""
         # Get all anomalies for this date
-        anomalies = self.session.query(OptionAnomaly).join(Stock).filter(
+        anomalies = self.session.query(OptionAnomaly).options(selectinload(OptionAnomaly.stock)).filter(
             OptionAnomaly.snapshot_date == target_date,
-            (OptionAnomaly.call_volume_trigger == True) |
-            (OptionAnomaly.put_volume_trigger == True) |
-            (OptionAnomaly.short_term_call_trigger == True) |
-            (OptionAnomaly.otm_call_trigger == True) |
-            (OptionAnomaly.call_oi_trigger == True)
+            OptionAnomaly.any_trigger.is_(True)
         ).all()
         
         if anomalies:
@@ -379,26 +555,24 @@ class OptionsTracker:
     def _log_data_source_success(self, data_source: str, operation: str, 
                                 records_processed: int = 0, execution_time: float = 0):
         """Log successful data source operation."""
-        log = DataSourceLog(
-            data_source=data_source,
-            operation=operation,
-            status="success",
-            records_processed=records_processed,
-            execution_time=execution_time
-        )
-        self.session.add(log)
+        self._log_buffer.append({
+            'data_source': data_source,
+            'operation': operation,
+            'status': "success",
+            'records_processed': records_processed,
+            'execution_time': execution_time
+        })
     
     def _log_data_source_error(self, data_source: str, operation: str, 
                               symbol: str, error_message: str):
         """Log data source error."""
-        log = DataSourceLog(
-            data_source=data_source,
-            operation=operation,
-            symbol=symbol,
-            status="error",
-            error_message=error_message
-        )
-        self.session.add(log)
+        self._log_buffer.append({
+            'data_source': data_source,
+            'operation': operation,
+            'symbol': symbol,
+            'status': "error",
+            'error_message': error_message
+        })
 
 # Global options tracker instance
 options_tracker = OptionsTracker() 
\ No newline at end of file
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+On-disk TTL cache for data-source responses.
+"""
+
+import json
+import hashlib
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, fields, is_dataclass
+from datetime import date, timedelta
+from functools import wraps
+from typing import Any, Optional
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+class FileCache:
+    """JSON files under {root}/{namespace}/{md5(key)}.json, each with its own expiry."""
+    
+    def __init__(self, root: str):
+        self.root = root
+    
+    def _path(self, namespace: str, key: str) -> str:
+        digest = hashlib.md5(key.encode()).hexdigest()
+        return os.path.join(self.root, namespace, f"{digest}.json")
+    
+    def get(self, namespace: str, key: str) -> Optional[dict]:
+        """Cached entry, or None when missing, unreadable or expired."""
+        try:
+            with open(self._path(namespace, key)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        expires = entry.get('expires')
+        if expires is not None and expires < time.time():
+            return None
+        return entry
+    
+    def set(self, namespace: str, key: str, entry: dict, ttl: Optional[timedelta]):
+        """Store an entry; a ttl of None keeps it until removed."""
+        path = self._path(namespace, key)
+        entry = {**entry, 'ts': time.time(), 'expires': None if ttl is None else time.time() + ttl.total_seconds()}
+        
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            
+            # Write then rename so concurrent readers never see a partial file
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(entry, f, default=_encode_value)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write cache entry {path}: {e}")
+
+def _encode_value(value: Any):
+    """JSON fallback for dates inside cached payloads."""
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Cannot cache value of type {type(value).__name__}")
+
+def _encode_item(item: Any):
+    return asdict(item) if is_dataclass(item) else item
+
+def _decode_item(model: type, item: Any):
+    """Rebuild a model instance (or date) from its JSON form."""
+    if model is date:
+        return date.fromisoformat(item)
+    
+    for field in fields(model):
+        if field.type is date and item.get(field.name) is not None:
+            item[field.name] = date.fromisoformat(item[field.name])
+    return model(**item)
+
+def cached(namespace: str, model: type, permanent_when_past: bool = False):
+    """Cache a data-source method's non-empty result (a model instance or a list of them) on disk.
+    
+    Only active with RESPONSE_CACHE_ENABLED. Results expire after RESPONSE_CACHE_TTL_MINUTES. With
+    permanent_when_past, results for a date argument before today (end-of-day data that no longer
+    changes) are kept indefinitely.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, *args):
+            if not config.RESPONSE_CACHE_ENABLED:
+                return method(self, *args)
+            
+            key = json.dumps(args, default=_encode_value)
+            entry = response_cache.get(namespace, key)
+            if entry is not None:
+                data = [_decode_item(model, item) for item in entry['data']]
+                return data if entry['many'] else data[0]
+            
+            result = method(self, *args)
+            if not result:
+                # Misses and failures are not cached, so they are retried next time
+                return result
+            
+            many = isinstance(result, list)
+            ttl = timedelta(minutes=config.RESPONSE_CACHE_TTL_MINUTES)
+            if permanent_when_past and any(isinstance(arg, date) and arg < date.today() for arg in args):
+                ttl = None
+            
+            response_cache.set(namespace, key, {
+                'many': many,
+                'data': [_encode_item(item) for item in (result if many else [result])]
+            }, ttl)
+            return result
+        
+        return wrapper
+    
+    return decorator
+
+# Global response cache instance
+response_cache = FileCache(config.RESPONSE_CACHE_DIR)
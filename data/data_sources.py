@@ -1,12 +1,22 @@
-import requests
 import pandas as pd
+import calendar
 import logging
-import time
-from typing import Dict, List, Optional, Tuple
-from datetime import datetime, date, timedelta
+import threading
+from concurrent.futures import Future
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+from datetime import date, timedelta
 from config import config
 from data.models import StockData, OptionsData
+from data.cache import cached
 from utils.rate_limiter import rate_limiter
+from utils.http_session import create_session, parse_json, stream_get
+
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
@@ -16,11 +26,12 @@ class PolygonDataSource:
     def __init__(self, api_key: str):
         self.api_key = api_key
         self.base_url = "https://api.polygon.io"
-        self.session = requests.Session()
+        self.session = create_session('polygon', http2=True)
         self.session.headers.update({
             'Authorization': f'Bearer {api_key}'
         })
     
+    @cached('polygon/stock_price', StockData, permanent_when_past=True)
     def get_stock_price(self, symbol: str, date: date) -> Optional[StockData]:
         """Get stock price data for a specific date."""
         try:
@@ -33,7 +44,7 @@ class PolygonDataSource:
             response = self.session.get(url, params=params, timeout=30)
             
             if response.status_code == 200:
-                data = response.json()
+                data = parse_json(response)
                 results = data.get('results', [])
                 
                 if results:
@@ -53,98 +64,114 @@ class PolygonDataSource:
             logger.error(f"Polygon stock price error for {symbol}: {e}")
             return None
     
+    @cached('polygon/options_chain', OptionsData)
     def get_options_chain(self, symbol: str, expiration_date: date) -> List[OptionsData]:
         """Get options chain for a specific expiration date."""
         try:
-            # Apply rate limiting
-            rate_limiter.wait_if_needed('polygon')
-            
-            # Use the correct Polygon.io options snapshot endpoint
+            # The snapshot endpoint returns every contract with quote, trade, OI and greeks,
+            # paginated through next_url, so a chain costs a couple of requests instead of 3 per contract
             url = f"{self.base_url}/v3/snapshot/options/{symbol}"
             params = {
                 'expiration_date': expiration_date.strftime('%Y-%m-%d'),
-                'limit': 1000
+                'limit': 250
             }
             
-            response = self.session.get(url, params=params, timeout=30)
-            
-            if response.status_code == 200:
-                data = response.json()
-                results = data.get('results', [])
+            options_data = []
+            while url:
+                # Apply rate limiting
+                rate_limiter.wait_if_needed('polygon')
                 
-                options_data = []
-                for contract in results:
-                    # Parse contract data properly
-                    options_data.append(OptionsData(
-                        symbol=symbol,
-                        expiration=expiration_date,
-                        strike=contract.get('strike_price', 0),
-                        option_type=contract.get('contract_type', 'CALL'),
-                        last_price=contract.get('last_price', 0),
-                        bid=contract.get('bid', 0),
-                        ask=contract.get('ask', 0),
-                        volume=contract.get('day_volume', 0),
-                        open_interest=contract.get('open_interest', 0),
-                        implied_volatility=contract.get('implied_volatility', 0),
-                        contract_symbol=contract.get('ticker', '')
-                    ))
+                if IJSON_AVAILABLE:
+                    with stream_get(self.session, url, params=params, timeout=30) as (response, chunks):
+                        if response.status_code == 200:
+                            next_url = self._stream_snapshot_page(chunks, symbol, expiration_date, options_data)
+                else:
+                    response = self.session.get(url, params=params, timeout=30)
+                    if response.status_code == 200:
+                        data = parse_json(response)
+                        options_data.extend(
+                            self._snapshot_to_option(symbol, expiration_date, contract)
+                            for contract in data.get('results', [])
+                        )
+                        next_url = data.get('next_url')
                 
-                return options_data
+                if response.status_code != 200:
+                    # A truncated chain would be cached and accepted as complete, so a failed later
+                    # page voids the whole chain and the manager falls back to the next source
+                    if options_data:
+                        logger.warning(f"Polygon options chain for {symbol} failed after {len(options_data)} "
+                                       f"contracts (HTTP {response.status_code}); discarding partial chain")
+                    return []
+                
+                # next_url already carries the query and cursor
+                url = next_url
+                params = None
             
-            return []
+            return options_data
             
         except Exception as e:
             logger.error(f"Polygon options chain error for {symbol}: {e}")
             return []
     
-    def _get_option_details(self, contract_ticker: str) -> Optional[OptionsData]:
-        """Get detailed options data for a specific contract."""
-        try:
-            url = f"{self.base_url}/v3/reference/options/contracts/{contract_ticker}"
-            response = self.session.get(url, timeout=30)
-            
-            if response.status_code == 200:
-                contract = response.json()['results']
-                
-                # Get latest trade data
-                trade_url = f"{self.base_url}/v3/trades/{contract_ticker}/last"
-                trade_response = self.session.get(trade_url, timeout=30)
-                
-                last_price = None
-                volume = 0
-                open_interest = 0
-                
-                if trade_response.status_code == 200:
-                    trade_data = trade_response.json()['results']
-                    last_price = trade_data.get('p')
-                
-                # Get open interest
-                oi_url = f"{self.base_url}/v3/reference/options/contracts/{contract_ticker}/open-interest"
-                oi_response = self.session.get(oi_url, timeout=30)
-                
-                if oi_response.status_code == 200:
-                    oi_data = oi_response.json()['results']
-                    open_interest = oi_data.get('open_interest', 0)
+    def _stream_snapshot_page(self, chunks, symbol: str, expiration_date: date,
+                              options_data: List[OptionsData]) -> Optional[str]:
+        """Parse a snapshot page as it downloads, converting each contract once it is complete.
+        
+        Returns the page's next_url.
+        """
+        events = ijson.sendable_list()
+        parser = ijson.parse_coro(events, use_float=True)
+        builder = None
+        next_url = None
+        
+        def consume():
+            nonlocal builder, next_url
+            for prefix, event, value in events:
+                if prefix == 'next_url':
+                    next_url = value
+                elif prefix == 'results.item' and event == 'start_map':
+                    builder = ijson.ObjectBuilder()
                 
-                return OptionsData(
-                    symbol=contract['underlying_ticker'],
-                    expiration=datetime.strptime(contract['expiration_date'], '%Y-%m-%d').date(),
-                    strike=contract['strike_price'],
-                    option_type=contract['contract_type'],
-                    last_price=last_price,
-                    bid=None,  # Polygon doesn't provide bid/ask in basic tier
-                    ask=None,
-                    volume=volume,
-                    open_interest=open_interest,
-                    implied_volatility=None,  # Available in premium tiers
-                    contract_symbol=contract_ticker
-                )
-            
-            return None
-            
-        except Exception as e:
-            logger.error(f"Polygon option details error for {contract_ticker}: {e}")
-            return None
+                if builder is not None:
+                    builder.event(event, value)
+                    if prefix == 'results.item' and event == 'end_map':
+                        options_data.append(self._snapshot_to_option(symbol, expiration_date, builder.value))
+                        builder = None
+            del events[:]
+        
+        for chunk in chunks:
+            parser.send(chunk)
+            consume()
+        parser.close()
+        consume()
+        
+        return next_url
+    
+    def _snapshot_to_option(self, symbol: str, expiration_date: date, contract: Dict) -> OptionsData:
+        """Build OptionsData from one options snapshot result."""
+        details = contract.get('details', {})
+        day = contract.get('day', {})
+        last_quote = contract.get('last_quote', {})
+        last_trade = contract.get('last_trade', {})
+        greeks = contract.get('greeks', {})
+        
+        return OptionsData(
+            symbol=symbol,
+            expiration=expiration_date,
+            strike=details.get('strike_price', 0),
+            option_type=details.get('contract_type', 'call').upper(),
+            last_price=last_trade.get('price', day.get('close', 0)),
+            bid=last_quote.get('bid'),
+            ask=last_quote.get('ask'),
+            volume=day.get('volume', 0),
+            open_interest=contract.get('open_interest', 0),
+            implied_volatility=contract.get('implied_volatility'),
+            delta=greeks.get('delta'),
+            gamma=greeks.get('gamma'),
+            theta=greeks.get('theta'),
+            vega=greeks.get('vega'),
+            contract_symbol=details.get('ticker', '')
+        )
 
 class AlphaVantageDataSource:
     """Alpha Vantage data source for stock data."""
@@ -152,8 +179,9 @@ class AlphaVantageDataSource:
     def __init__(self, api_key: str):
         self.api_key = api_key
         self.base_url = "https://www.alphavantage.co/query"
-        self.session = requests.Session()
+        self.session = create_session('alpha_vantage')
     
+    @cached('alpha_vantage/stock_price', StockData, permanent_when_past=True)
     def get_stock_price(self, symbol: str, date: date) -> Optional[StockData]:
         """Get stock price data for a specific date."""
         try:
@@ -170,7 +198,7 @@ class AlphaVantageDataSource:
             response = self.session.get(self.base_url, params=params, timeout=30)
             
             if response.status_code == 200:
-                data = response.json()
+                data = parse_json(response)
                 time_series = data.get('Time Series (Daily)', {})
                 
                 date_str = date.strftime('%Y-%m-%d')
@@ -191,141 +219,160 @@ class AlphaVantageDataSource:
             logger.error(f"Alpha Vantage stock price error for {symbol}: {e}")
             return None
 
+@lru_cache(maxsize=1)
+def _expirations_for(today: date) -> Tuple[date, ...]:
+    """Common expiration dates as of a day; pure date arithmetic, so computed once per day."""
+    expirations = []
+    
+    # Add next few Fridays
+    next_friday = today + timedelta(days=(calendar.FRIDAY - today.weekday()) % 7)
+    for i in range(config.WEEKLY_EXPIRATIONS):
+        expirations.append(next_friday + timedelta(weeks=i))
+    
+    # Add monthly expirations (third Friday of each month)
+    for i in range(1, config.MONTHLY_EXPIRATIONS + 1):
+        year, month = today.year + (today.month - 1 + i) // 12, (today.month - 1 + i) % 12 + 1
+        first_friday = 1 + (calendar.FRIDAY - calendar.weekday(year, month, 1)) % 7
+        expirations.append(date(year, month, first_friday + 14))
+    
+    return tuple(sorted(set(expirations)))
+
+class _LazySources(dict):
+    """Data sources by name, each constructed (and its module imported) on first access."""
+    
+    def __init__(self, factories: Dict[str, Callable]):
+        super().__init__()
+        self.factories = factories
+        self.lock = threading.Lock()
+    
+    def __contains__(self, name) -> bool:
+        return name in self.factories
+    
+    def __missing__(self, name: str):
+        with self.lock:
+            if not dict.__contains__(self, name):
+                self[name] = self.factories[name]()
+            return dict.__getitem__(self, name)
+
+def _yahoo_finance_source():
+    from data.yahoo_finance_source import yahoo_finance_source
+    return yahoo_finance_source
+
+def _quandl_source():
+    from data.quandl_source import QuandlDataSource
+    return QuandlDataSource(config.QUANDL_API_KEY)
+
 class DataSourceManager:
     """Manages multiple data sources with fallback mechanisms."""
     
     def __init__(self):
-        self.sources = {}
+        factories = {}
         
-        # Initialize available data sources (prioritize Polygon)
+        # Fallback order per data type (Polygon first, as the most reliable)
+        self._stock_order = ('polygon', 'alpha_vantage', 'yahoo_finance')
+        self._options_order = ('polygon', 'alpha_vantage', 'quandl', 'yahoo_finance')
+        
+        # Lookups currently being fetched, so concurrent callers for the same key share one fetch
+        self._inflight: Dict[tuple, Future] = {}
+        self._inflight_lock = threading.Lock()
+        
+        # Register available data sources (prioritize Polygon); each is only built when first used,
+        # so runs served by the primary source never import or construct the fallbacks
         if config.POLYGON_API_KEY:
-            self.sources['polygon'] = PolygonDataSource(config.POLYGON_API_KEY)
+            factories['polygon'] = lambda: PolygonDataSource(config.POLYGON_API_KEY)
         
         if config.ALPHA_VANTAGE_API_KEY:
-            self.sources['alpha_vantage'] = AlphaVantageDataSource(config.ALPHA_VANTAGE_API_KEY)
+            factories['alpha_vantage'] = lambda: AlphaVantageDataSource(config.ALPHA_VANTAGE_API_KEY)
         
         # Always add Yahoo Finance as fallback
-        from data.yahoo_finance_source import yahoo_finance_source
-        self.sources['yahoo_finance'] = yahoo_finance_source
+        factories['yahoo_finance'] = _yahoo_finance_source
         
         # Add Quandl if API key is available
         if config.QUANDL_API_KEY:
-            from data.quandl_source import QuandlDataSource
-            self.sources['quandl'] = QuandlDataSource(config.QUANDL_API_KEY)
+            factories['quandl'] = _quandl_source
+        
+        self.sources = _LazySources(factories)
     
     def get_stock_price(self, symbol: str, target_date: date) -> Optional[StockData]:
         """Get stock price from available sources with fallback."""
-        # Try Polygon first (most reliable)
-        if 'polygon' in self.sources:
-            try:
-                logger.info(f"Trying polygon for {symbol} stock price")
-                data = self.sources['polygon'].get_stock_price(symbol, target_date)
-                if data:
-                    logger.info(f"Successfully got stock price from polygon")
-                    return data
-                time.sleep(config.RATE_LIMIT_DELAY)
-            except Exception as e:
-                logger.error(f"Error getting stock price from polygon: {e}")
-        
-        # Fallback to Alpha Vantage if available
-        if 'alpha_vantage' in self.sources:
-            try:
-                logger.info(f"Trying alpha_vantage for {symbol} stock price")
-                data = self.sources['alpha_vantage'].get_stock_price(symbol, target_date)
-                if data:
-                    logger.info(f"Successfully got stock price from alpha_vantage")
-                    return data
-                time.sleep(config.RATE_LIMIT_DELAY)
-            except Exception as e:
-                logger.error(f"Error getting stock price from alpha_vantage: {e}")
-        
-        # Fallback to Yahoo Finance
-        if 'yahoo_finance' in self.sources:
-            try:
-                logger.info(f"Trying yahoo_finance for {symbol} stock price")
-                data = self.sources['yahoo_finance'].get_stock_price(symbol, target_date)
-                if data:
-                    logger.info(f"Successfully got stock price from yahoo_finance")
-                    return data
-                time.sleep(config.RATE_LIMIT_DELAY)
-            except Exception as e:
-                logger.error(f"Error getting stock price from yahoo_finance: {e}")
-        
-        logger.warning(f"Failed to get stock price for {symbol} from all sources")
-        return None
+        data = self._coalesce(('stock_price', symbol, target_date), self._first_from_sources,
+                              self._stock_order, 'get_stock_price', "stock price", symbol, target_date)
+        if data is None:
+            logger.warning(f"Failed to get stock price for {symbol} from all sources")
+        return data
     
     def get_options_data(self, symbol: str, expiration_date: date) -> List[OptionsData]:
         """Get options data from available sources."""
-        # Try Polygon first (most reliable)
-        if 'polygon' in self.sources and hasattr(self.sources['polygon'], 'get_options_chain'):
-            try:
-                logger.info(f"Trying polygon for {symbol} options")
-                data = self.sources['polygon'].get_options_chain(symbol, expiration_date)
-                if data and any(opt.volume > 0 or opt.open_interest > 0 for opt in data):
-                    logger.info(f"Successfully got options data from polygon")
-                    return data
-                time.sleep(config.RATE_LIMIT_DELAY)
-            except Exception as e:
-                logger.error(f"Error getting options data from polygon: {e}")
+        data = self._coalesce(('options', symbol, expiration_date), self._first_from_sources,
+                              self._options_order, 'get_options_chain', "options", symbol, expiration_date)
+        if data is None:
+            logger.warning(f"Failed to get options data for {symbol} from all sources")
+            return []
+        return data
+    
+    def _coalesce(self, key: tuple, fetch, *args):
+        """Run fetch(*args) unless the same key is already in flight, in which case wait for that result."""
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
         
-        # Fallback to Alpha Vantage if available
-        if 'alpha_vantage' in self.sources and hasattr(self.sources['alpha_vantage'], 'get_options_chain'):
-            try:
-                logger.info(f"Trying alpha_vantage for {symbol} options")
-                data = self.sources['alpha_vantage'].get_options_chain(symbol, expiration_date)
-                if data and any(opt.volume > 0 or opt.open_interest > 0 for opt in data):
-                    logger.info(f"Successfully got options data from alpha_vantage")
-                    return data
-                time.sleep(config.RATE_LIMIT_DELAY)
-            except Exception as e:
-                logger.error(f"Error getting options data from alpha_vantage: {e}")
+        if not owner:
+            return future.result()
         
-        # Fallback to Quandl if available
-        if 'quandl' in self.sources and hasattr(self.sources['quandl'], 'get_options_chain'):
-            try:
-                logger.info(f"Trying quandl for {symbol} options")
-                data = self.sources['quandl'].get_options_chain(symbol, expiration_date)
-                if data and any(opt.volume > 0 or opt.open_interest > 0 for opt in data):
-                    logger.info(f"Successfully got options data from quandl")
-                    return data
-                time.sleep(config.RATE_LIMIT_DELAY)
-            except Exception as e:
-                logger.error(f"Error getting options data from quandl: {e}")
+        # The first caller fetches on its own thread and publishes the outcome to any waiters
+        try:
+            result = fetch(*args)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+    
+    def _first_from_sources(self, order: Tuple[str, ...], method: str, label: str, symbol: str, *args):
+        """Try the configured sources in priority order and return the first acceptable result, or None.
         
-        # Fallback to Yahoo Finance
-        if 'yahoo_finance' in self.sources and hasattr(self.sources['yahoo_finance'], 'get_options_chain'):
+        A fallback is only called once the sources before it have failed or come back unusable,
+        so the preferred source wins whenever it has data and fallback quota is spent only when needed.
+        """
+        for name in order:
+            # Sources are built lazily, so fallbacks are only constructed once they are actually needed
+            if name not in self.sources:
+                continue
+            source = self.sources[name]
+            if not hasattr(source, method):
+                continue
+            
             try:
-                logger.info(f"Trying yahoo_finance for {symbol} options")
-                data = self.sources['yahoo_finance'].get_options_chain(symbol, expiration_date)
-                if data and any(opt.volume > 0 or opt.open_interest > 0 for opt in data):
-                    logger.info(f"Successfully got options data from yahoo_finance")
-                    return data
-                time.sleep(config.RATE_LIMIT_DELAY)
+                logger.info(f"Trying {name} for {symbol} {label}")
+                data = getattr(source, method)(symbol, *args)
             except Exception as e:
-                logger.error(f"Error getting options data from yahoo_finance: {e}")
+                logger.error(f"Error getting {label} from {name}: {e}")
+                continue
+            
+            if self._accept(data):
+                logger.info(f"Successfully got {label} from {name}")
+                return data
         
-        logger.warning(f"Failed to get options data for {symbol} from all sources")
-        return []
+        return None
+    
+    @staticmethod
+    def _accept(data) -> bool:
+        """Whether a source's result is usable: a price, or a chain with some activity."""
+        if isinstance(data, list):
+            # Sources may report missing counts as None
+            return any((opt.volume or 0) > 0 or (opt.open_interest or 0) > 0 for opt in data)
+        return bool(data)
     
     def get_available_expirations(self, symbol: str) -> List[date]:
         """Get available expiration dates for a symbol."""
         # This would need to be implemented based on the specific data source
-        # For now, return common expiration dates
-        today = date.today()
-        expirations = []
-        
-        # Add next few Fridays
-        for i in range(1, 9):  # Next 8 weeks
-            next_friday = today + timedelta(days=(4 - today.weekday() + 7 * i) % 7)
-            expirations.append(next_friday)
-        
-        # Add monthly expirations
-        for i in range(1, 4):  # Next 3 months
-            month_date = today.replace(day=1) + timedelta(days=32 * i)
-            third_friday = month_date.replace(day=1) + timedelta(days=(4 - month_date.weekday() + 14) % 7)
-            expirations.append(third_friday)
-        
-        return sorted(list(set(expirations)))
+        # For now, return common expiration dates (the same for every symbol on a given day)
+        return list(_expirations_for(date.today()))
     
     def test_connection(self, source_name: str) -> bool:
         """Test connection to a specific data source."""
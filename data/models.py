@@ -7,7 +7,7 @@ from dataclasses import dataclass
 from datetime import date
 from typing import Optional
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class StockData:
     """Stock price data."""
     symbol: str
@@ -17,7 +17,7 @@ class StockData:
     low_price: Optional[float] = None
     volume: Optional[int] = None
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class OptionsData:
     """Options contract data."""
     symbol: str
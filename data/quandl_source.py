@@ -3,24 +3,30 @@
 Quandl data source for options data.
 """
 
-import requests
 import logging
 import time
+import pandas as pd
 from typing import List, Optional
-from datetime import date, datetime
+from datetime import date
 from data.models import OptionsData, StockData
+from data.cache import cached
 from utils.rate_limiter import rate_limiter
+from utils.http_session import create_session, parse_json
 
 logger = logging.getLogger(__name__)
 
+# Leading columns of a Quandl OPRA row
+QUANDL_OPTION_COLUMNS = ['date', 'strike', 'option_type', 'expiration', 'volume', 'open_interest']
+
 class QuandlDataSource:
     """Quandl data source for options and stock data."""
     
     def __init__(self, api_key: str):
         self.api_key = api_key
         self.base_url = "https://www.quandl.com/api/v3"
-        self.session = requests.Session()
+        self.session = create_session('quandl', http2=True)
     
+    @cached('quandl/stock_price', StockData, permanent_when_past=True)
     def get_stock_price(self, symbol: str, target_date: date) -> Optional[StockData]:
         """Get stock price data for a specific date."""
         try:
@@ -39,7 +45,7 @@ class QuandlDataSource:
             response = self.session.get(url, timeout=30)
             
             if response.status_code == 200:
-                data = response.json()
+                data = parse_json(response)
                 if 'dataset_data' in data and 'data' in data['dataset_data']:
                     rows = data['dataset_data']['data']
                     if rows:
@@ -59,9 +65,13 @@ class QuandlDataSource:
             logger.error(f"Quandl stock price error for {symbol}: {e}")
             return None
     
+    @cached('quandl/options_chain', OptionsData)
     def get_options_chain(self, symbol: str, expiration_date: date) -> List[OptionsData]:
         """Get options chain for a specific expiration date."""
         try:
+            # Apply rate limiting
+            rate_limiter.wait_if_needed('quandl')
+            
             # Quandl options data endpoint
             url = f"{self.base_url}/datasets/OPRA/{symbol}/data.json"
             params = {
@@ -74,33 +84,52 @@ class QuandlDataSource:
             response = self.session.get(url, timeout=30)
             
             if response.status_code == 200:
-                data = response.json()
+                data = parse_json(response)
                 if 'dataset_data' in data and 'data' in data['dataset_data']:
                     rows = data['dataset_data']['data']
-                    options_data = []
+                    if not rows:
+                        return []
                     
-                    for row in rows:
-                        # Parse options data from Quandl format
-                        # Format: [Date, Strike, Option_Type, Expiration, Volume, Open_Interest, ...]
-                        try:
-                            options_data.append(OptionsData(
-                                symbol=symbol,
-                                expiration=expiration_date,
-                                strike=float(row[1]),
-                                option_type=row[2].upper(),
-                                last_price=0.0,  # Not available in Quandl
-                                bid=0.0,
-                                ask=0.0,
-                                volume=int(row[4]) if row[4] else 0,
-                                open_interest=int(row[5]) if row[5] else 0,
-                                implied_volatility=0.0,
-                                contract_symbol=f"{symbol}{expiration_date.strftime('%y%m%d')}{row[2].upper()}{int(float(row[1])*1000):08d}"
-                            ))
-                        except (ValueError, IndexError) as e:
-                            logger.warning(f"Error parsing options row: {e}")
-                            continue
+                    # Parse the whole chain column-wise
+                    # Format: [Date, Strike, Option_Type, Expiration, Volume, Open_Interest, ...]
+                    frame = pd.DataFrame(rows).reindex(columns=range(6))
+                    frame.columns = QUANDL_OPTION_COLUMNS
+                    
+                    strike = pd.to_numeric(frame['strike'], errors='coerce')
+                    option_type = frame['option_type'].where(frame['option_type'].map(type) == str).str.upper()
+                    valid = strike.notna() & option_type.notna()
+                    if not valid.all():
+                        logger.warning(f"Skipping {(~valid).sum()} unparseable Quandl options rows for {symbol}")
+                    
+                    strike = strike[valid]
+                    option_type = option_type[valid]
+                    volume = pd.to_numeric(frame['volume'][valid], errors='coerce').fillna(0).astype('int64')
+                    open_interest = pd.to_numeric(frame['open_interest'][valid], errors='coerce').fillna(0).astype('int64')
                     
-                    return options_data
+                    # Symbol and expiration code are shared by every contract in the chain
+                    contract_prefix = f"{symbol}{expiration_date.strftime('%y%m%d')}"
+                    contract_symbol = (contract_prefix + option_type
+                                       + (strike * 1000).astype('int64').astype(str).str.zfill(8))
+                    
+                    return [
+                        OptionsData(
+                            symbol=symbol,
+                            expiration=expiration_date,
+                            strike=strike_value,
+                            option_type=type_value,
+                            last_price=0.0,  # Not available in Quandl
+                            bid=0.0,
+                            ask=0.0,
+                            volume=volume_value,
+                            open_interest=oi_value,
+                            implied_volatility=0.0,
+                            contract_symbol=contract_value
+                        )
+                        for strike_value, type_value, volume_value, oi_value, contract_value in zip(
+                            strike.tolist(), option_type.tolist(), volume.tolist(),
+                            open_interest.tolist(), contract_symbol.tolist()
+                        )
+                    ]
             
             return []
             
@@ -108,9 +137,13 @@ class QuandlDataSource:
             logger.error(f"Quandl options error for {symbol}: {e}")
             return []
     
+    @cached('quandl/expirations', date)
     def get_available_expirations(self, symbol: str) -> List[date]:
         """Get available expiration dates for a symbol."""
         try:
+            # Apply rate limiting
+            rate_limiter.wait_if_needed('quandl')
+            
             # Get available dates from Quandl
             url = f"{self.base_url}/datasets/OPRA/{symbol}/data.json"
             params = {
@@ -122,16 +155,16 @@ class QuandlDataSource:
             response = self.session.get(url, timeout=30)
             
             if response.status_code == 200:
-                data = response.json()
+                data = parse_json(response)
                 if 'dataset_data' in data and 'data' in data['dataset_data']:
                     rows = data['dataset_data']['data']
                     expirations = set()
                     
-                    for row in rows:
+                    # Rows repeat the same few expirations, so parse each distinct string once
+                    for value in {row[3] for row in rows if len(row) > 3}:
                         try:
-                            exp_date = datetime.strptime(row[3], '%Y-%m-%d').date()
-                            expirations.add(exp_date)
-                        except (ValueError, IndexError):
+                            expirations.add(date.fromisoformat(value))
+                        except (TypeError, ValueError):
                             continue
                     
                     return sorted(list(expirations))
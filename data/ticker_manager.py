@@ -1,35 +1,67 @@
 import pandas as pd
-import requests
+import lxml.html
 import logging
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Dict, Optional
 from datetime import datetime
 import time
 from config import config
+from utils.http_session import create_session, parse_json
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# Plain tickers of up to 5 ASCII letters (drops share classes like BRK-B and non-ASCII junk)
+TICKER_PATTERN = re.compile(r'[A-Za-z]{1,5}')
+
+# Lower bounds of the ticker ranges paged through concurrently in get_polygon_tickers
+POLYGON_TICKER_RANGES = ('', 'C', 'F', 'J', 'M', 'P', 'S', 'V')
+
 class TickerManager:
     """Manages stock ticker lists from multiple sources."""
     
     def __init__(self):
-        self.session = requests.Session()
+        self.session = create_session('ticker_lists')
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
     
+    def _scrape_wiki_symbols(self, url: str) -> List[str]:
+        """Symbol column of the first wikitable on a Wikipedia page that has one, with '.' as '-'."""
+        response = self.session.get(url, timeout=30)
+        response.raise_for_status()
+        
+        # Pull just the one column with XPath instead of building DataFrames for every table on the page
+        root = lxml.html.fromstring(response.content)
+        for table in root.xpath('//table[contains(@class, "wikitable")]'):
+            rows = table.xpath('.//tr')
+            if not rows:
+                continue
+            
+            headers = [cell.text_content().strip() for cell in rows[0].xpath('./th')]
+            if 'Symbol' in headers:
+                column = headers.index('Symbol') + 1
+                symbols = (cell.text_content().strip() for cell in table.xpath(f'.//tr/td[{column}]'))
+                return [symbol.replace('.', '-') for symbol in symbols if symbol]
+        
+        return []
+    
     def get_sp500_tickers(self) -> List[str]:
         """Get S&P 500 tickers from Wikipedia."""
         try:
             url = "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
-            tables = pd.read_html(url)
+            symbols = self._scrape_wiki_symbols(url)
             
-            for table in tables:
-                if 'Symbol' in table.columns:
-                    symbols = table['Symbol'].str.replace(r'\.', '-', regex=True).tolist()
-                    logger.info(f"Retrieved {len(symbols)} S&P 500 tickers")
-                    return symbols
-            
-            return []
+            if symbols:
+                logger.info(f"Retrieved {len(symbols)} S&P 500 tickers")
+            return symbols
         except Exception as e:
             logger.error(f"Failed to fetch S&P 500 tickers: {e}")
             return []
@@ -38,15 +70,11 @@ class TickerManager:
         """Get S&P 400 tickers from Wikipedia."""
         try:
             url = "https://en.wikipedia.org/wiki/List_of_S%26P_400_companies"
-            tables = pd.read_html(url)
-            
-            for table in tables:
-                if 'Symbol' in table.columns:
-                    symbols = table['Symbol'].str.replace(r'\.', '-', regex=True).tolist()
-                    logger.info(f"Retrieved {len(symbols)} S&P 400 tickers")
-                    return symbols
+            symbols = self._scrape_wiki_symbols(url)
             
-            return []
+            if symbols:
+                logger.info(f"Retrieved {len(symbols)} S&P 400 tickers")
+            return symbols
         except Exception as e:
             logger.error(f"Failed to fetch S&P 400 tickers: {e}")
             return []
@@ -55,15 +83,11 @@ class TickerManager:
         """Get S&P 600 tickers from Wikipedia."""
         try:
             url = "https://en.wikipedia.org/wiki/List_of_S%26P_600_companies"
-            tables = pd.read_html(url)
+            symbols = self._scrape_wiki_symbols(url)
             
-            for table in tables:
-                if 'Symbol' in table.columns:
-                    symbols = table['Symbol'].str.replace(r'\.', '-', regex=True).tolist()
-                    logger.info(f"Retrieved {len(symbols)} S&P 600 tickers")
-                    return symbols
-            
-            return []
+            if symbols:
+                logger.info(f"Retrieved {len(symbols)} S&P 600 tickers")
+            return symbols
         except Exception as e:
             logger.error(f"Failed to fetch S&P 600 tickers: {e}")
             return []
@@ -126,36 +150,12 @@ class TickerManager:
             return []
         
         try:
-            url = "https://api.polygon.io/v3/reference/tickers"
-            params = {
-                'apiKey': config.POLYGON_API_KEY,
-                'market': 'stocks',
-                'active': 'true',
-                'limit': 1000
-            }
-            
-            symbols = []
-            while True:
-                response = self.session.get(url, params=params, timeout=30)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    results = data.get('results', [])
-                    
-                    for ticker in results:
-                        if ticker.get('type') == 'CS' and ticker.get('active'):
-                            symbols.append(ticker['ticker'])
-                    
-                    # Check for next page
-                    next_url = data.get('next_url')
-                    if next_url and len(symbols) < 10000:  # Limit to prevent infinite loops
-                        url = f"https://api.polygon.io{next_url}"
-                        time.sleep(0.1)  # Rate limiting
-                    else:
-                        break
-                else:
-                    logger.error(f"Polygon API error: {response.status_code}")
-                    break
+            # Cursor pagination is inherently sequential, so split the ticker space into ranges
+            # and page through them side by side
+            bounds = list(POLYGON_TICKER_RANGES) + [None]
+            with ThreadPoolExecutor(max_workers=len(POLYGON_TICKER_RANGES), thread_name_prefix='polygon_tickers') as executor:
+                ranges = executor.map(self._get_polygon_ticker_range, bounds[:-1], bounds[1:])
+                symbols = [symbol for symbols_in_range in ranges for symbol in symbols_in_range]
             
             logger.info(f"Retrieved {len(symbols)} tickers from Polygon")
             return symbols
@@ -164,6 +164,47 @@ class TickerManager:
             logger.error(f"Failed to fetch Polygon tickers: {e}")
             return []
     
+    def _get_polygon_ticker_range(self, lower: Optional[str], upper: Optional[str]) -> List[str]:
+        """Active common-stock tickers from Polygon in [lower, upper), following next_url."""
+        url = "https://api.polygon.io/v3/reference/tickers"
+        params = {
+            'apiKey': config.POLYGON_API_KEY,
+            'market': 'stocks',
+            'type': 'CS',
+            'active': 'true',
+            'limit': 1000
+        }
+        if lower:
+            params['ticker.gte'] = lower
+        if upper:
+            params['ticker.lt'] = upper
+        
+        symbols = []
+        while True:
+            response = self.session.get(url, params=params, timeout=30)
+            
+            if response.status_code == 200:
+                data = parse_json(response)
+                results = data.get('results', [])
+                
+                for ticker in results:
+                    if ticker.get('type') == 'CS' and ticker.get('active'):
+                        symbols.append(ticker['ticker'])
+                
+                # Check for next page; next_url carries the cursor and filters but not the key
+                next_url = data.get('next_url')
+                if next_url and len(symbols) < 10000:  # Limit to prevent infinite loops
+                    url = next_url if next_url.startswith('http') else f"https://api.polygon.io{next_url}"
+                    params = {'apiKey': config.POLYGON_API_KEY}
+                    time.sleep(0.1)  # Rate limiting
+                else:
+                    break
+            else:
+                logger.error(f"Polygon API error: {response.status_code}")
+                break
+        
+        return symbols
+    
     def get_comprehensive_ticker_list(self, sources: List[str] = None) -> List[str]:
         """Get comprehensive ticker list from multiple sources."""
         if sources is None:
@@ -180,33 +221,44 @@ class TickerManager:
             'polygon': self.get_polygon_tickers
         }
         
-        for source in sources:
-            if source in source_methods:
+        # Each source is a different site, so fetch them all at once rather than one after another
+        selected = [source for source in sources if source in source_methods]
+        with ThreadPoolExecutor(max_workers=max(1, len(selected)), thread_name_prefix='tickers') as executor:
+            futures = {executor.submit(source_methods[source]): source for source in selected}
+            
+            for future in as_completed(futures):
+                source = futures[future]
                 try:
-                    symbols = source_methods[source]()
+                    symbols = future.result()
                     all_symbols.update(symbols)
                     logger.info(f"Added {len(symbols)} symbols from {source}")
-                    time.sleep(1)  # Rate limiting between sources
                 except Exception as e:
                     logger.error(f"Failed to get tickers from {source}: {e}")
         
-        # Clean and filter symbols
-        cleaned_symbols = []
-        for symbol in all_symbols:
-            if isinstance(symbol, str) and len(symbol) <= 5 and symbol.isalpha():
-                cleaned_symbols.append(symbol.upper())
+        # Clean and filter symbols (upper-casing can merge duplicates, so dedupe after it)
+        cleaned_symbols = sorted({
+            symbol.upper() for symbol in all_symbols
+            if isinstance(symbol, str) and TICKER_PATTERN.fullmatch(symbol)
+        })
         
         logger.info(f"Total unique tickers: {len(cleaned_symbols)}")
-        return sorted(cleaned_symbols)
+        return cleaned_symbols
     
     def save_ticker_list(self, symbols: List[str], filename: str = "comprehensive_tickers.csv"):
         """Save ticker list to CSV file."""
         try:
-            df = pd.DataFrame({
-                'Symbol': symbols,
-                'Added_Date': datetime.now().date()
-            })
-            df.to_csv(filename, index=False)
+            if PYARROW_AVAILABLE:
+                table = pa.table({
+                    'Symbol': pa.array(symbols, pa.string()),
+                    'Added_Date': pa.array([datetime.now().date()] * len(symbols), pa.date32())
+                })
+                pa_csv.write_csv(table, filename)
+            else:
+                df = pd.DataFrame({
+                    'Symbol': symbols,
+                    'Added_Date': datetime.now().date()
+                })
+                df.to_csv(filename, index=False)
             logger.info(f"Saved {len(symbols)} tickers to {filename}")
             return filename
         except Exception as e:
@@ -216,8 +268,17 @@ class TickerManager:
     def load_ticker_list(self, filename: str = "comprehensive_tickers.csv") -> List[str]:
         """Load ticker list from CSV file."""
         try:
-            df = pd.read_csv(filename)
-            symbols = df['Symbol'].tolist()
+            if PYARROW_AVAILABLE:
+                # Read symbols as plain strings so tickers like "NA" aren't taken for nulls
+                table = pa_csv.read_csv(filename, convert_options=pa_csv.ConvertOptions(
+                    include_columns=['Symbol'],
+                    column_types={'Symbol': pa.string()},
+                    strings_can_be_null=False
+                ))
+                symbols = table.column('Symbol').to_pylist()
+            else:
+                df = pd.read_csv(filename, usecols=['Symbol'], dtype={'Symbol': str}, keep_default_na=False)
+                symbols = df['Symbol'].tolist()
             logger.info(f"Loaded {len(symbols)} tickers from {filename}")
             return symbols
         except Exception as e:
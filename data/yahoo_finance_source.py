@@ -3,26 +3,43 @@
 Yahoo Finance data source for options data.
 """
 
-import requests
 import logging
 import time
-from typing import List, Optional
+import pandas as pd
+from typing import Dict, List, Optional
 from datetime import date, datetime
+from dataclasses import fields
 from data.models import OptionsData, StockData
+from data.cache import cached
 from utils.rate_limiter import rate_limiter
+from utils.http_session import create_session, parse_json
 
 logger = logging.getLogger(__name__)
 
+# Yahoo contract keys -> OptionsData fields, with the default used when Yahoo leaves one out
+YAHOO_OPTION_COLUMNS = {
+    'strike': ('strike', 0),
+    'lastPrice': ('last_price', 0),
+    'bid': ('bid', 0),
+    'ask': ('ask', 0),
+    'volume': ('volume', 0),
+    'openInterest': ('open_interest', 0),
+    'impliedVolatility': ('implied_volatility', 0),
+    'contractSymbol': ('contract_symbol', '')
+}
+OPTIONS_DATA_FIELDS = [field.name for field in fields(OptionsData)]
+
 class YahooFinanceDataSource:
     """Yahoo Finance data source for options and stock data."""
     
     def __init__(self):
         self.base_url = "https://query2.finance.yahoo.com/v7/finance"
-        self.session = requests.Session()
+        self.session = create_session('yahoo_finance')
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
     
+    @cached('yahoo_finance/stock_price', StockData, permanent_when_past=True)
     def get_stock_price(self, symbol: str, target_date: date) -> Optional[StockData]:
         """Get stock price data for a specific date."""
         try:
@@ -38,7 +55,7 @@ class YahooFinanceDataSource:
             response = self.session.get(url, timeout=30)
             
             if response.status_code == 200:
-                data = response.json()
+                data = parse_json(response)
                 if 'chart' in data and 'result' in data['chart']:
                     result = data['chart']['result'][0]
                     if 'timestamp' in result and 'indicators' in result:
@@ -64,6 +81,7 @@ class YahooFinanceDataSource:
             logger.error(f"Yahoo Finance stock price error for {symbol}: {e}")
             return None
     
+    @cached('yahoo_finance/options_chain', OptionsData)
     def get_options_chain(self, symbol: str, expiration_date: date) -> List[OptionsData]:
         """Get options chain for a specific expiration date."""
         try:
@@ -78,49 +96,12 @@ class YahooFinanceDataSource:
             response = self.session.get(url, timeout=30)
             
             if response.status_code == 200:
-                data = response.json()
+                data = parse_json(response)
                 if 'optionChain' in data and 'result' in data['optionChain']:
                     result = data['optionChain']['result'][0]
                     if 'options' in result:
-                        options = result['options']
-                        options_data = []
-                        
-                        for option in options:
-                            # Process calls
-                            if 'calls' in option:
-                                for call in option['calls']:
-                                    options_data.append(OptionsData(
-                                        symbol=symbol,
-                                        expiration=expiration_date,
-                                        strike=call.get('strike', 0),
-                                        option_type='CALL',
-                                        last_price=call.get('lastPrice', 0),
-                                        bid=call.get('bid', 0),
-                                        ask=call.get('ask', 0),
-                                        volume=call.get('volume', 0),
-                                        open_interest=call.get('openInterest', 0),
-                                        implied_volatility=call.get('impliedVolatility', 0),
-                                        contract_symbol=call.get('contractSymbol', '')
-                                    ))
-                            
-                            # Process puts
-                            if 'puts' in option:
-                                for put in option['puts']:
-                                    options_data.append(OptionsData(
-                                        symbol=symbol,
-                                        expiration=expiration_date,
-                                        strike=put.get('strike', 0),
-                                        option_type='PUT',
-                                        last_price=put.get('lastPrice', 0),
-                                        bid=put.get('bid', 0),
-                                        ask=put.get('ask', 0),
-                                        volume=put.get('volume', 0),
-                                        open_interest=put.get('openInterest', 0),
-                                        implied_volatility=put.get('impliedVolatility', 0),
-                                        contract_symbol=put.get('contractSymbol', '')
-                                    ))
-                        
-                        return options_data
+                        frame = self._chain_frame(symbol, expiration_date, result['options'])
+                        return [OptionsData(*row) for row in frame.itertuples(index=False, name=None)]
             
             return []
             
@@ -128,15 +109,46 @@ class YahooFinanceDataSource:
             logger.error(f"Yahoo Finance options error for {symbol}: {e}")
             return []
     
+    def _chain_frame(self, symbol: str, expiration_date: date, options: List[Dict]) -> pd.DataFrame:
+        """All calls and puts of a Yahoo options result as one frame with OptionsData's columns, in field order."""
+        frames = [
+            pd.DataFrame(option[side]).assign(option_type=option_type)
+            for option in options
+            for side, option_type in (('calls', 'CALL'), ('puts', 'PUT'))
+            if option.get(side)
+        ]
+        if not frames:
+            return pd.DataFrame(columns=OPTIONS_DATA_FIELDS)
+        
+        chain = pd.concat(frames, ignore_index=True)
+        frame = pd.DataFrame({'symbol': symbol, 'expiration': expiration_date}, index=chain.index)
+        for key, (column, default) in YAHOO_OPTION_COLUMNS.items():
+            frame[column] = chain[key].fillna(default) if key in chain else default
+        frame['option_type'] = chain['option_type']
+        
+        # Counts arrive as floats once a missing value has been filled
+        frame['volume'] = frame['volume'].astype('int64')
+        frame['open_interest'] = frame['open_interest'].astype('int64')
+        
+        # Greeks aren't provided by Yahoo
+        for column in ('delta', 'gamma', 'theta', 'vega'):
+            frame[column] = None
+        
+        return frame[OPTIONS_DATA_FIELDS]
+    
+    @cached('yahoo_finance/expirations', date)
     def get_available_expirations(self, symbol: str) -> List[date]:
         """Get available expiration dates for a symbol."""
         try:
+            # Apply rate limiting
+            rate_limiter.wait_if_needed('yahoo_finance')
+            
             url = f"{self.base_url}/options/{symbol}"
             
             response = self.session.get(url, timeout=30)
             
             if response.status_code == 200:
-                data = response.json()
+                data = parse_json(response)
                 if 'optionChain' in data and 'result' in data['optionChain']:
                     result = data['optionChain']['result'][0]
                     if 'expirationDates' in result:
@@ -1,7 +1,9 @@
 from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import QueuePool
 from contextlib import contextmanager
+from datetime import date, timedelta
 import logging
 from typing import Generator
 from config import config
@@ -21,6 +23,15 @@ class DatabaseManager:
         safe_url = self.database_url.replace(self.database_url.split('@')[0].split(':')[-1], '***')
         logger.info(f"Connecting to database: {safe_url}")
         
+        # Batch executemany UPDATE/DELETE with psycopg2 (INSERTs already use multi-row VALUES)
+        url = make_url(self.database_url)
+        driver_options = {}
+        if url.get_backend_name() == "postgresql" and url.get_driver_name() == "psycopg2":
+            driver_options = {
+                "executemany_mode": "values_plus_batch",
+                "executemany_batch_page_size": 500
+            }
+        
         # Create engine with optimized settings
         self.engine = create_engine(
             self.database_url,
@@ -30,10 +41,12 @@ class DatabaseManager:
             pool_pre_ping=True,
             pool_recycle=3600,  # Recycle connections after 1 hour
             echo=False,  # Set to True for SQL debugging
+            insertmanyvalues_page_size=1000,  # Rows per multi-row INSERT ... VALUES
             connect_args={
                 "connect_timeout": 10,
                 "application_name": "options_tracker"
-            }
+            },
+            **driver_options
         )
         
         # Create session factory
@@ -43,6 +56,9 @@ class DatabaseManager:
             autoflush=False,
             expire_on_commit=False
         )
+        
+        # Months whose option_data partition is known to exist
+        self._option_partitions = set()
     
     @contextmanager
     def get_session(self) -> Generator[Session, None, None]:
@@ -69,6 +85,31 @@ class DatabaseManager:
             logger.error(f"Database connection failed: {e}")
             return False
     
+    def ensure_option_partitions(self, snapshot_date: date, months_ahead: int = 1):
+        """Create the monthly option_data partitions for snapshot_date's month (and the next ones) if missing."""
+        if self.engine.dialect.name != "postgresql":
+            return
+        
+        month = snapshot_date.replace(day=1)
+        with self.engine.begin() as conn:
+            # 'p' is a partitioned table; anything else means the partitioning migration hasn't run yet
+            relkind = conn.execute(text(
+                "SELECT relkind FROM pg_class WHERE oid = to_regclass('option_data')"
+            )).scalar()
+            if relkind != 'p':
+                logger.warning("option_data is not partitioned; skipping partition creation (run migrations)")
+                return
+            
+            for _ in range(months_ahead + 1):
+                next_month = (month + timedelta(days=32)).replace(day=1)
+                if month not in self._option_partitions:
+                    conn.execute(text(
+                        f"CREATE TABLE IF NOT EXISTS option_data_{month:%Y_%m} PARTITION OF option_data "
+                        f"FOR VALUES FROM ('{month}') TO ('{next_month}')"
+                    ))
+                    self._option_partitions.add(month)
+                month = next_month
+    
     def create_tables(self):
         """Create all tables if they don't exist."""
         from .models import Base
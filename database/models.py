@@ -1,6 +1,6 @@
 from sqlalchemy import (
     Column, Integer, String, Float, Date, DateTime, Boolean, 
-    UniqueConstraint, ForeignKey, Index, Text, Numeric
+    UniqueConstraint, ForeignKey, Index, Text, Numeric, Computed, text
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
@@ -89,7 +89,12 @@ class OptionData(Base):
         UniqueConstraint('contract_symbol', 'snapshot_date', name='uq_option_contract_date'),
         Index('idx_option_data_stock_date', 'stock_id', 'snapshot_date'),
         Index('idx_option_data_expiration', 'expiration'),
-        Index('idx_option_data_type', 'option_type'),
+        # Covers the detector's per-date scans (index-only on PostgreSQL)
+        Index('idx_option_data_date_stock', 'snapshot_date', 'stock_id',
+              postgresql_include=['expiration', 'strike', 'option_type', 'volume', 'open_interest',
+                                  'implied_volatility']),
+        # On PostgreSQL the table is range-partitioned by snapshot_date with a (id, snapshot_date)
+        # primary key; that layout lives in migration f3a8c6e1b927 so create_all stays portable
     )
 
 class OptionAnomaly(Base):
@@ -134,6 +139,13 @@ class OptionAnomaly(Base):
     insider_probability = Column(Float)  # ML-based probability
     notes = Column(Text)
     
+    # Any of the trigger flags set; maintained by the database for the alert query
+    any_trigger = Column(Boolean, Computed(
+        "call_volume_trigger OR put_volume_trigger OR short_term_call_trigger "
+        "OR otm_call_trigger OR call_oi_trigger",
+        persisted=True
+    ))
+    
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
     
@@ -144,6 +156,8 @@ class OptionAnomaly(Base):
         UniqueConstraint('stock_id', 'snapshot_date', name='uq_anomaly_stock_date'),
         Index('idx_anomaly_date', 'snapshot_date'),
         Index('idx_anomaly_triggers', 'call_volume_trigger', 'put_volume_trigger', 'short_term_call_trigger'),
+        Index('idx_anomaly_trigger', 'snapshot_date',
+              postgresql_where=text('any_trigger'), sqlite_where=text('any_trigger')),
     )
 
 class DataSourceLog(Base):
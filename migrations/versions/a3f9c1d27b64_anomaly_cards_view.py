@@ -0,0 +1,62 @@
+"""Anomaly cards materialized view
+
+Revision ID: a3f9c1d27b64
+Revises: 2bb492188d4f
+Create Date: 2026-10-16 09:12:41.503218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3f9c1d27b64'
+down_revision = '2bb492188d4f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Dashboard anomaly cards rendered once per refresh instead of on every page load
+    op.execute("""
+    CREATE MATERIALIZED VIEW mv_anomaly_cards AS
+    SELECT
+        oa.stock_id,
+        oa.snapshot_date,
+        s.symbol,
+        oa.insider_probability,
+        risk.risk_class,
+        format(
+            '<div class="metric-card %s"><h4>%s %s - %s%% Insider Probability</h4>'
+            '<p><strong>Activity Score:</strong> %s</p>'
+            '<p><strong>Notes:</strong> %s</p></div>',
+            risk.risk_class,
+            risk.risk_emoji,
+            s.symbol,
+            round((oa.insider_probability * 100)::numeric, 1),
+            round(oa.unusual_activity_score::numeric, 2),
+            coalesce(oa.notes, '')
+        ) AS card_html
+    FROM option_anomalies oa
+    JOIN stocks s ON oa.stock_id = s.id
+    CROSS JOIN LATERAL (
+        SELECT
+            CASE WHEN oa.insider_probability >= 0.7 THEN 'anomaly-high'
+                 WHEN oa.insider_probability >= 0.4 THEN 'anomaly-medium'
+                 ELSE 'anomaly-low' END AS risk_class,
+            CASE WHEN oa.insider_probability >= 0.7 THEN '🔴'
+                 WHEN oa.insider_probability >= 0.4 THEN '🟡'
+                 ELSE '🟢' END AS risk_emoji
+    ) risk
+    WHERE oa.call_volume_trigger OR oa.put_volume_trigger
+       OR oa.short_term_call_trigger OR oa.otm_call_trigger
+       OR oa.call_oi_trigger
+    WITH DATA
+    """)
+    # Unique index required for REFRESH ... CONCURRENTLY
+    op.create_index('idx_mv_anomaly_cards_stock_date', 'mv_anomaly_cards', ['stock_id', 'snapshot_date'], unique=True)
+    op.create_index('idx_mv_anomaly_cards_date_prob', 'mv_anomaly_cards', ['snapshot_date', 'insider_probability'], unique=False)
+
+
+def downgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_anomaly_cards")
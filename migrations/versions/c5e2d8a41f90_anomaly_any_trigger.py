@@ -0,0 +1,35 @@
+"""Anomaly any_trigger column
+
+Revision ID: c5e2d8a41f90
+Revises: a3f9c1d27b64
+Create Date: 2026-10-16 14:03:27.881640
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e2d8a41f90'
+down_revision = 'a3f9c1d27b64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Single stored flag so the daily alert query is one partial-index lookup instead of five ORs
+    op.add_column('option_anomalies', sa.Column(
+        'any_trigger', sa.Boolean(),
+        sa.Computed(
+            "call_volume_trigger OR put_volume_trigger OR short_term_call_trigger "
+            "OR otm_call_trigger OR call_oi_trigger",
+            persisted=True
+        )
+    ))
+    op.create_index('idx_anomaly_trigger', 'option_anomalies', ['snapshot_date'],
+                    unique=False, postgresql_where=sa.text('any_trigger'))
+
+
+def downgrade() -> None:
+    op.drop_index('idx_anomaly_trigger', table_name='option_anomalies')
+    op.drop_column('option_anomalies', 'any_trigger')
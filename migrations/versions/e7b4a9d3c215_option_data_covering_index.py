@@ -0,0 +1,35 @@
+"""Option data covering index
+
+Revision ID: e7b4a9d3c215
+Revises: c5e2d8a41f90
+Create Date: 2026-10-16 17:42:09.516203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7b4a9d3c215'
+down_revision = 'c5e2d8a41f90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Built concurrently so ingestion isn't blocked on a large option_data table
+    with op.get_context().autocommit_block():
+        op.create_index('idx_option_data_date_stock', 'option_data', ['snapshot_date', 'stock_id'],
+                        unique=False,
+                        postgresql_include=['expiration', 'strike', 'option_type', 'volume',
+                                            'open_interest', 'implied_volatility'],
+                        postgresql_concurrently=True)
+        # Two distinct values; never selective enough to be used
+        op.drop_index('idx_option_data_type', table_name='option_data', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('idx_option_data_type', 'option_data', ['option_type'], unique=False,
+                        postgresql_concurrently=True)
+        op.drop_index('idx_option_data_date_stock', table_name='option_data', postgresql_concurrently=True)
@@ -0,0 +1,84 @@
+"""Partition option_data by snapshot_date
+
+Revision ID: f3a8c6e1b927
+Revises: e7b4a9d3c215
+Create Date: 2026-10-16 18:26:51.304417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a8c6e1b927'
+down_revision = 'e7b4a9d3c215'
+branch_labels = None
+depends_on = None
+
+
+def _create_indexes() -> None:
+    op.create_index('idx_option_data_expiration', 'option_data', ['expiration'], unique=False)
+    op.create_index('idx_option_data_stock_date', 'option_data', ['stock_id', 'snapshot_date'], unique=False)
+    op.create_index('idx_option_data_date_stock', 'option_data', ['snapshot_date', 'stock_id'],
+                    unique=False,
+                    postgresql_include=['expiration', 'strike', 'option_type', 'volume',
+                                        'open_interest', 'implied_volatility'])
+
+
+def upgrade() -> None:
+    # A table can't be turned into a partitioned one in place: build the partitioned copy,
+    # move the rows over, then swap it in under the original name
+    op.execute(
+        "CREATE TABLE option_data_partitioned (LIKE option_data INCLUDING DEFAULTS) "
+        "PARTITION BY RANGE (snapshot_date)"
+    )
+
+    # One partition per month from the oldest snapshot through next month
+    op.execute("""
+        DO $$
+        DECLARE
+            month date;
+        BEGIN
+            FOR month IN
+                SELECT generate_series(
+                    date_trunc('month', COALESCE(MIN(snapshot_date), CURRENT_DATE)),
+                    date_trunc('month', GREATEST(MAX(snapshot_date), CURRENT_DATE + interval '1 month')),
+                    interval '1 month'
+                )::date
+                FROM option_data
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE option_data_%s PARTITION OF option_data_partitioned FOR VALUES FROM (%L) TO (%L)',
+                    to_char(month, 'YYYY_MM'), month, (month + interval '1 month')::date
+                );
+            END LOOP;
+        END $$;
+    """)
+
+    op.execute("INSERT INTO option_data_partitioned SELECT * FROM option_data")
+
+    # Keep the id sequence alive when the old table is dropped
+    op.execute("ALTER SEQUENCE option_data_id_seq OWNED BY option_data_partitioned.id")
+    op.drop_table('option_data')
+    op.rename_table('option_data_partitioned', 'option_data')
+
+    # Unique constraints on a partitioned table must include the partition key
+    op.create_primary_key('option_data_pkey', 'option_data', ['id', 'snapshot_date'])
+    op.create_unique_constraint('uq_option_contract_date', 'option_data', ['contract_symbol', 'snapshot_date'])
+    op.create_foreign_key('option_data_stock_id_fkey', 'option_data', 'stocks', ['stock_id'], ['id'])
+    _create_indexes()
+
+
+def downgrade() -> None:
+    op.execute("CREATE TABLE option_data_plain (LIKE option_data INCLUDING DEFAULTS)")
+    op.execute("INSERT INTO option_data_plain SELECT * FROM option_data")
+
+    op.execute("ALTER SEQUENCE option_data_id_seq OWNED BY option_data_plain.id")
+    # Dropping the partitioned parent drops its partitions too
+    op.drop_table('option_data')
+    op.rename_table('option_data_plain', 'option_data')
+
+    op.create_primary_key('option_data_pkey', 'option_data', ['id'])
+    op.create_unique_constraint('uq_option_contract_date', 'option_data', ['contract_symbol', 'snapshot_date'])
+    op.create_foreign_key('option_data_stock_id_fkey', 'option_data', 'stocks', ['stock_id'], ['id'])
+    _create_indexes()
@@ -0,0 +1,102 @@
+import logging
+import time
+from contextlib import contextmanager
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import config
+from utils.rate_limiter import rate_limiter
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import httpx
+    import h2  # noqa: F401 - required by httpx for HTTP/2
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+RETRY_STATUSES = (500, 502, 503, 504)
+
+logger = logging.getLogger(__name__)
+
+def create_session(data_source: str, pool_connections: int = 16, pool_maxsize: int = 64, http2: bool = False):
+    """HTTP session for a data source with a large keep-alive pool, retries and rate-limit tracking.
+    
+    With http2 (and HTTP2_ENABLED, httpx and h2 installed) an httpx client is returned instead, which
+    multiplexes concurrent requests over one TLS connection; its get/headers/response API matches requests.
+    """
+    if http2 and config.HTTP2_ENABLED and HTTP2_AVAILABLE:
+        return httpx.Client(
+            transport=_RateLimitedTransport(
+                data_source,
+                http2=True,
+                retries=config.MAX_RETRIES,
+                limits=httpx.Limits(max_keepalive_connections=pool_connections, max_connections=pool_maxsize)
+            ),
+            timeout=config.REQUEST_TIMEOUT
+        )
+    
+    session = requests.Session()
+    
+    # Server errors are retried with backoff here; 429s are left to the rate limiter's hook
+    retries = Retry(
+        total=config.MAX_RETRIES,
+        backoff_factor=0.3,
+        status_forcelist=[500, 502, 503, 504],
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retries)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    
+    rate_limiter.attach(session, data_source)
+    return session
+
+if HTTP2_AVAILABLE:
+    class _RateLimitedTransport(httpx.HTTPTransport):
+        """HTTP/2 transport with the same server-error retries and rate-limit tracking as create_session's adapter."""
+        
+        def __init__(self, data_source: str, **kwargs):
+            super().__init__(**kwargs)
+            self.data_source = data_source
+        
+        def handle_request(self, request):
+            response = super().handle_request(request)
+            rate_limiter.update_from_response(self.data_source, response)
+            
+            for attempt in range(config.MAX_RETRIES):
+                if response.status_code == 429:
+                    logger.warning(f"{self.data_source} returned 429, backing off before retrying")
+                    rate_limiter.wait_if_needed(self.data_source)
+                elif response.status_code in RETRY_STATUSES:
+                    time.sleep(0.3 * 2 ** attempt)
+                else:
+                    break
+                
+                response.close()
+                response = super().handle_request(request)
+                rate_limiter.update_from_response(self.data_source, response)
+            
+            return response
+
+@contextmanager
+def stream_get(session, url: str, **kwargs):
+    """GET whose body is read incrementally; yields the response and an iterator over its (decoded) bytes."""
+    if HTTP2_AVAILABLE and isinstance(session, httpx.Client):
+        with session.stream('GET', url, **kwargs) as response:
+            yield response, response.iter_bytes()
+    else:
+        with session.get(url, stream=True, **kwargs) as response:
+            yield response, response.iter_content(chunk_size=64 * 1024)
+
+def parse_json(response):
+    """Decode a JSON response body, with orjson when it is installed."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(response.content)
+    return response.json()
@@ -1,14 +1,17 @@
 import time
+import random
 import logging
-from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
 from typing import Dict, Optional
 from collections import defaultdict
 import threading
 
+from config import config
+
 logger = logging.getLogger(__name__)
 
 class RateLimiter:
-    """Rate limiter for API calls with configurable limits per data source."""
+    """Token-bucket rate limiter for API calls with configurable limits per data source."""
     
     def __init__(self):
         # Rate limits per data source (requests per minute)
@@ -20,73 +23,154 @@ class RateLimiter:
             'default': 3  # Default rate limit
         }
         
-        # Track request timestamps for each data source
-        self.request_history = defaultdict(list)
+        # Bucket state per data source: available tokens and when they were last refilled
+        self.tokens: Dict[str, float] = {}
+        self.refilled_at: Dict[str, float] = {}
+        
+        # Provider-imposed pauses (429 / exhausted quota) and consecutive 429 counts for backoff
+        self.blocked_until: Dict[str, float] = {}
+        self.throttle_count = defaultdict(int)
+        
         self.lock = threading.Lock()
     
     def get_rate_limit(self, data_source: str) -> int:
         """Get rate limit for a specific data source."""
         return self.rate_limits.get(data_source, self.rate_limits['default'])
     
+    def _refill(self, data_source: str, now: float) -> float:
+        """Top up a source's bucket for the time elapsed since the last refill (caller holds the lock)."""
+        rate_limit = self.get_rate_limit(data_source)
+        tokens = self.tokens.get(data_source, float(rate_limit))
+        elapsed = now - self.refilled_at.get(data_source, now)
+        
+        self.tokens[data_source] = min(float(rate_limit), tokens + elapsed * rate_limit / 60.0)
+        self.refilled_at[data_source] = now
+        return self.tokens[data_source]
+    
     def can_make_request(self, data_source: str) -> bool:
         """Check if a request can be made without exceeding rate limit."""
         with self.lock:
-            now = datetime.now()
-            rate_limit = self.get_rate_limit(data_source)
-            
-            # Clean old requests (older than 1 minute)
-            cutoff_time = now - timedelta(minutes=1)
-            self.request_history[data_source] = [
-                timestamp for timestamp in self.request_history[data_source]
-                if timestamp > cutoff_time
-            ]
-            
-            # Check if we're under the rate limit
-            return len(self.request_history[data_source]) < rate_limit
+            now = time.monotonic()
+            return self._refill(data_source, now) >= 1 and now >= self.blocked_until.get(data_source, 0)
     
     def wait_if_needed(self, data_source: str) -> float:
         """Wait if necessary to respect rate limits. Returns wait time in seconds."""
         with self.lock:
-            if self.can_make_request(data_source):
-                # Record the request
-                self.request_history[data_source].append(datetime.now())
-                return 0.0
+            now = time.monotonic()
+            tokens = self._refill(data_source, now)
+            
+            # Take the token now; a deficit becomes this caller's wait, so concurrent callers queue up
+            self.tokens[data_source] = tokens - 1
+            wait_time = max(
+                0.0,
+                (1 - tokens) * 60.0 / self.get_rate_limit(data_source),
+                self.blocked_until.get(data_source, 0) - now
+            )
+        
+        # Sleep outside the lock so other sources aren't held up
+        if wait_time > 0:
+            logger.info(f"Rate limit reached for {data_source}, waiting {wait_time:.2f} seconds")
+            time.sleep(wait_time)
+        
+        return wait_time
+    
+    def update_from_response(self, data_source: str, response):
+        """Adjust a source's limiter from a response's rate-limit headers and status."""
+        headers = response.headers
+        
+        with self.lock:
+            now = time.monotonic()
             
-            # Calculate wait time
-            oldest_request = min(self.request_history[data_source])
-            wait_until = oldest_request + timedelta(minutes=1)
-            wait_time = max(0, (wait_until - datetime.now()).total_seconds())
+            # The provider's remaining quota can only tighten our own estimate
+            remaining = _parse_int(headers.get('X-RateLimit-Remaining'))
+            if remaining is not None:
+                self.tokens[data_source] = min(self._refill(data_source, now), float(remaining))
             
-            if wait_time > 0:
-                logger.info(f"Rate limit reached for {data_source}, waiting {wait_time:.2f} seconds")
-                time.sleep(wait_time)
+            if response.status_code == 429:
+                self.throttle_count[data_source] += 1
+                delay = _parse_retry_after(headers.get('Retry-After'))
+                if delay is None:
+                    # Exponential backoff with jitter when the provider doesn't say how long to wait
+                    delay = min(60.0, 2.0 ** self.throttle_count[data_source]) + random.random()
+            elif remaining == 0:
+                delay = _parse_reset(headers.get('X-RateLimit-Reset'))
+            else:
+                self.throttle_count[data_source] = 0
+                delay = None
             
-            # Record the request after waiting
-            self.request_history[data_source].append(datetime.now())
-            return wait_time
+            if delay:
+                self.blocked_until[data_source] = max(self.blocked_until.get(data_source, 0), now + delay)
+    
+    def attach(self, session, data_source: str):
+        """Feed a requests session's responses into the limiter and retry 429s after backing off."""
+        def on_response(response, *args, **kwargs):
+            self.update_from_response(data_source, response)
+            
+            for _ in range(config.MAX_RETRIES):
+                if response.status_code != 429:
+                    break
+                
+                logger.warning(f"{data_source} returned 429, backing off before retrying")
+                self.wait_if_needed(data_source)
+                
+                # Release the throttled connection, then resend the same request
+                response.content
+                response.close()
+                retry = response.connection.send(response.request, **kwargs)
+                retry.history.append(response)
+                response = retry
+                self.update_from_response(data_source, response)
+            
+            return response
+        
+        session.hooks['response'].append(on_response)
     
     def get_status(self, data_source: str) -> Dict:
         """Get current rate limiting status for a data source."""
         with self.lock:
-            now = datetime.now()
-            cutoff_time = now - timedelta(minutes=1)
-            
-            # Clean old requests
-            self.request_history[data_source] = [
-                timestamp for timestamp in self.request_history[data_source]
-                if timestamp > cutoff_time
-            ]
-            
+            now = time.monotonic()
             rate_limit = self.get_rate_limit(data_source)
-            current_requests = len(self.request_history[data_source])
+            tokens = self._refill(data_source, now)
+            current_requests = rate_limit - max(0, int(tokens))
+            blocked = now < self.blocked_until.get(data_source, 0)
             
             return {
                 'data_source': data_source,
                 'rate_limit': rate_limit,
                 'current_requests': current_requests,
                 'remaining_requests': max(0, rate_limit - current_requests),
-                'can_make_request': current_requests < rate_limit
+                'can_make_request': tokens >= 1 and not blocked
             }
 
+def _parse_int(value: Optional[str]) -> Optional[int]:
+    """Parse an integer header value, ignoring missing or malformed ones."""
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    if value is None:
+        return None
+    
+    seconds = _parse_int(value)
+    if seconds is not None:
+        return max(0.0, float(seconds))
+    
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def _parse_reset(value: Optional[str]) -> Optional[float]:
+    """Seconds until an X-RateLimit-Reset, given as epoch seconds or as seconds from now."""
+    reset = _parse_int(value)
+    if reset is None:
+        return None
+    
+    # Large values are epoch timestamps, small ones a relative delay
+    return max(0.0, reset - time.time()) if reset > 1_000_000_000 else float(reset)
+
 # Global rate limiter instance
-rate_limiter = RateLimiter() 
\ No newline at end of file
+rate_limiter = RateLimiter()